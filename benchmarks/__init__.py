@@ -0,0 +1 @@
+"""Benchmarks for FSBot, run from the repository root with python -m benchmarks.<name>"""
@@ -0,0 +1,93 @@
+"""
+Measures AnomalyCog.vehicle_destroy_event_handler throughput on a synthetic VehicleDestroy stream, against the
+previous handler scanning every stored anomaly and the aircraft id list for each event.
+
+Events are spread over every anomaly world and zone, with a share of them on zones with an active anomaly.
+Usage: python -m benchmarks.anomaly_routing --events 200000 --anomalies 1,3,5 --anomaly-share 0.2
+"""
+
+# External Imports
+import argparse
+import logging
+import random
+import time
+
+import auraxium
+
+# Internal Imports, census_replay first as it imports modules in main.py's order
+from benchmarks.census_replay import AnomalyStandIn
+from cogs.anomalynotify import AnomalyEvent, WORLD_DICT, ZONE_DICT, AIRCRAFT_ID_DICT, ANOMALY_IDS, STATE_DICT_STR
+
+GROUND_IDS = (1, 2, 3, 4, 5, 6, 12, 15)
+
+
+def scan_handler(cog: AnomalyStandIn, evt):
+    """vehicle_destroy_event_handler before the world / zone index"""
+    relevant_anom = [anom for anom in cog.events.values() if anom.world_id == evt.world_id
+                     and anom.zone_id == evt.zone_id]
+    if not relevant_anom or len(relevant_anom) > 1:
+        return
+    if evt.attacker_vehicle_id not in AIRCRAFT_ID_DICT.values() or evt.vehicle_id not in AIRCRAFT_ID_DICT.values():
+        return
+    if evt.attacker_team_id == evt.faction_id:
+        return
+    relevant_anom[0].add_kill(evt.attacker_character_id)
+
+
+def stand_in(zones: list[tuple[int, int]]) -> AnomalyStandIn:
+    cog = AnomalyStandIn()
+    for instance_id, (world_id, zone_id) in enumerate(zones):
+        cog._add_event(AnomalyEvent(ANOMALY_IDS[0], int(time.time()), zone_id, world_id, instance_id,
+                                    STATE_DICT_STR['Started']))
+    return cog
+
+
+def event_stream(count: int, zones: list[tuple[int, int]], anomaly_share: float, rng: random.Random) -> list:
+    all_zones = [(world_id, zone_id) for world_id in WORLD_DICT for zone_id in ZONE_DICT]
+    other_zones = [zone for zone in all_zones if zone not in zones]
+    aircraft = list(AIRCRAFT_ID_DICT.values())
+    stream = []
+    for _ in range(count):
+        world_id, zone_id = rng.choice(zones if rng.random() < anomaly_share else other_zones)
+        vehicles = aircraft if rng.random() < 0.5 else GROUND_IDS
+        stream.append(auraxium.event.VehicleDestroy(
+            event_name="VehicleDestroy", timestamp=int(time.time()), world_id=world_id, zone_id=zone_id,
+            attacker_character_id=rng.randint(1, 2000), attacker_loadout_id=0,
+            attacker_vehicle_id=rng.choice(vehicles), attacker_weapon_id=0, attacker_team_id=rng.randint(1, 3),
+            character_id=rng.randint(1, 2000), facility_id=0, faction_id=rng.randint(1, 3),
+            team_id=rng.randint(1, 3), vehicle_id=rng.choice(vehicles)))
+    return stream
+
+
+def run(handler, cog: AnomalyStandIn, stream: list) -> tuple[float, int]:
+    start = time.perf_counter()
+    for evt in stream:
+        handler(cog, evt)
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(anom.total_kills for anom in cog.events.values())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--events', default=200000, type=int)
+    ap.add_argument('--anomalies', default="1,3,5", type=str, help="Comma separated counts of active anomalies")
+    ap.add_argument('--anomaly-share', default=0.2, type=float, help="Fraction of events on anomaly zones")
+    args = ap.parse_args()
+    logging.getLogger('fs_bot').setLevel(logging.WARNING)  # Per kill debug logs
+
+    rng = random.Random(0)
+    worlds = list(WORLD_DICT)
+    print(f"{args.events} VehicleDestroy events, {args.anomaly_share:.0%} on anomaly zones:")
+    print(f"{'anomalies':>10}{'scan (us/evt)':>15}{'index (us/evt)':>16}{'speedup':>9}{'kills':>8}")
+    for count in (int(n) for n in args.anomalies.split(",")):
+        zones = [(worlds[i % len(worlds)], list(ZONE_DICT)[i % len(ZONE_DICT)]) for i in range(count)]
+        stream = event_stream(args.events, zones, args.anomaly_share, rng)
+        scan, scan_kills = run(scan_handler, stand_in(zones), stream)
+        index, kills = run(AnomalyStandIn.vehicle_destroy_event_handler, stand_in(zones), stream)
+        assert kills == scan_kills, "Indexed routing counted different kills"
+        print(f"{count:>10}{scan / args.events * 1e6:>15.3f}{index / args.events * 1e6:>16.3f}"
+              f"{scan / index:>8.1f}x{kills:>8}")
+
+
+if __name__ == '__main__':
+    main()
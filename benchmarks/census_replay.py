@@ -0,0 +1,466 @@
+"""
+Records Census, Saerro and Honu traffic to disk, and replays it from a local stand-in, so modules.census and the
+anomaly kill-feed can be load-tested and profiled with no network.
+
+A capture directory holds rest.jsonl, every HTTP response by normalised request, events.jsonl, every websocket
+payload with its offset in seconds, and meta.json, the character ids tracked while recording.
+Replaying serves both from one local aiohttp server: HTTP requests made through aiohttp are redirected to it,
+and EventClients connect to it instead of the Census push service, receiving the payloads at a speed factor.
+Usage:
+    python -m benchmarks.census_replay record --out captures/evening --duration 600 --chars 5428...,5428...
+    python -m benchmarks.census_replay synth --out captures/restart --chars 2000 --kills 20000
+    python -m benchmarks.census_replay replay --capture captures/restart --speed 10
+"""
+
+# External Imports
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+import aiohttp
+import auraxium
+import auraxium.event._client as ess_client
+import yarl
+from aiohttp import web
+
+# Internal Imports, in main.py's import order
+import modules.config as cfg
+import modules.accounts_handler as accounts
+import modules.census as census
+from cogs.anomalynotify import AnomalyCog, WORLD_DICT, ANOMALY_IDS
+from benchmarks.census_rest import FakePlayer
+
+LOCAL_HOST = "127.0.0.1"
+ESS_PATH = "/streaming"
+
+
+def request_key(method: str, host: str, path: str, query) -> str:
+    """Key a request by method, host, path and sorted query, without the service id, so captures made with
+    one api key replay under any other"""
+    path = "/".join(part for part in path.split("/") if not part.startswith("s:"))
+    query = sorted((k, v) for k, v in query.items() if k != "service-id")
+    return f"{method.upper()} {host}{path}?{urlencode(query)}"
+
+
+def _append(path: str, record: dict):
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+class Recorder:
+    """Context manager writing every aiohttp response and EventClient payload to a capture directory"""
+
+    def __init__(self, out_dir: str, tracked: list[int] | None = None):
+        self.out_dir = out_dir
+        self.tracked = tracked or []
+        self.counts = {"rest": 0, "events": 0}
+        self._start = 0.0
+        self._originals = ()
+
+    def __enter__(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(os.path.join(self.out_dir, "meta.json"), "w") as f:
+            json.dump({"recorded": int(time.time()), "tracked": self.tracked}, f)
+        self._start = time.monotonic()
+        original_request = aiohttp.ClientSession._request
+        original_process = ess_client.EventClient._process_payload
+        self._originals = (original_request, original_process)
+        rest_path = os.path.join(self.out_dir, "rest.jsonl")
+        events_path = os.path.join(self.out_dir, "events.jsonl")
+        recorder = self
+
+        async def _request(session, method, str_or_url, **kwargs):
+            resp = await original_request(session, method, str_or_url, **kwargs)
+            body = await resp.read()  # Cached on the response, so the caller can still read it
+            url = yarl.URL(str_or_url)
+            if kwargs.get("params"):
+                url = url.update_query(kwargs["params"])
+            _append(rest_path, {"key": request_key(method, url.host, url.path, url.query), "status": resp.status,
+                                "content_type": resp.content_type, "body": body.decode(errors="replace")})
+            recorder.counts["rest"] += 1
+            return resp
+
+        def _process_payload(client, response: str):
+            _append(events_path, {"t": round(time.monotonic() - recorder._start, 4), "payload": response})
+            recorder.counts["events"] += 1
+            return original_process(client, response)
+
+        aiohttp.ClientSession._request = _request
+        ess_client.EventClient._process_payload = _process_payload
+        return self
+
+    def __exit__(self, *exc):
+        aiohttp.ClientSession._request, ess_client.EventClient._process_payload = self._originals
+
+
+class ReplayServer:
+    """
+    Local stand-in serving a capture.  Each HTTP request gets the recorded responses for its key in turn,
+    cycling when they run out.  Each websocket connection is streamed the payloads from the current replay position,
+    the furthest any connection has reached, starting after the client sends its first subscription.  So a client
+    connecting mid-replay, like the kill-feed websocket, joins it as it would live.  Payloads aren't filtered by
+    subscription, triggers still check their own characters and worlds.
+
+    :param capture_dir: Directory written by Recorder or synth.
+    :param speed: Replay speed factor, 0 sends payloads as fast as the connection allows.
+    :param clients: Websocket connections to wait for before starting the replay, all streamed from the start.
+    """
+
+    def __init__(self, capture_dir: str, speed: float = 1.0, clients: int = 1):
+        self.speed = speed
+        self.clients = clients
+        self._started = asyncio.Event()
+        self.responses: dict[str, list[dict]] = dict()
+        self.events: list[tuple[float, str]] = []
+        self.meta = {"tracked": []}
+        self.stats = {"rest_hits": 0, "rest_misses": 0, "connections": 0, "subscribed": 0, "subscriptions": 0, "sent": 0,
+                      "received": 0, "streams_finished": 0, "max_send_lag": 0.0}
+        self._served: dict[str, int] = dict()
+        self.position = 0  # Index of the next payload in the replay
+        self._runner: web.AppRunner | None = None
+        self._originals = ()
+        self.port = 0
+
+        rest_path, events_path = (os.path.join(capture_dir, name) for name in ("rest.jsonl", "events.jsonl"))
+        if os.path.exists(rest_path):
+            with open(rest_path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.responses.setdefault(record["key"], []).append(record)
+        if os.path.exists(events_path):
+            with open(events_path) as f:
+                self.events = [(record["t"], record["payload"]) for record in map(json.loads, f)]
+        if os.path.exists(meta_path := os.path.join(capture_dir, "meta.json")):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+
+    async def _rest(self, request: web.Request):
+        _, host, path = request.path.split("/", 2)
+        key = request_key(request.method, host, "/" + path, request.query)
+        if not (records := self.responses.get(key)):
+            self.stats["rest_misses"] += 1
+            return web.Response(status=404, text=f"No capture for {key}")
+        self.stats["rest_hits"] += 1
+        index = self._served.get(key, 0)
+        self._served[key] = index + 1
+        record = records[index % len(records)]
+        return web.Response(status=record["status"], text=record["body"], content_type=record["content_type"])
+
+    async def _stream(self, request: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats["connections"] += 1
+        subscribed = asyncio.Event()
+
+        async def read_subscriptions():
+            async for _ in ws:
+                self.stats["subscriptions"] += 1
+                subscribed.set()
+
+        reader = asyncio.create_task(read_subscriptions())
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(subscribed.wait(), timeout=5)
+        self.stats["subscribed"] += 1
+        if not self._started.is_set():
+            if self.stats["subscribed"] >= self.clients:
+                self._started.set()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._started.wait(), timeout=5)
+            self._started.set()
+        start = time.perf_counter()
+        begin = self.position
+        first = self.events[begin][0] if begin < len(self.events) else 0
+        for index in range(begin, len(self.events)):
+            offset, payload = self.events[index]
+            if self.speed:
+                target = (offset - first) / self.speed
+                if (ahead := target - (time.perf_counter() - start)) > 0:
+                    await asyncio.sleep(ahead)
+                else:
+                    self.stats["max_send_lag"] = max(self.stats["max_send_lag"], -ahead)
+            else:
+                await asyncio.sleep(0)  # Let other connections stream too
+            if ws.closed:
+                break
+            await ws.send_str(payload)
+            self.stats["sent"] += 1
+            self.position = max(self.position, index + 1)
+        self.stats["streams_finished"] += 1
+        await reader
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get(ESS_PATH, self._stream)
+        app.router.add_route("*", "/{tail:.*}", self._rest)
+        self._runner = web.AppRunner(app, max_line_size=1 << 20)  # Long Census URLs, see census_rest
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, LOCAL_HOST, 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def __enter__(self):
+        """Redirect aiohttp requests and new EventClients to this server, start() must have been awaited"""
+        original_request = aiohttp.ClientSession._request
+        original_endpoints = ess_client.default_endpoints
+        original_process = ess_client.EventClient._process_payload
+        self._originals = (original_request, original_endpoints, original_process)
+        port, stats = self.port, self.stats
+
+        async def _request(session, method, str_or_url, **kwargs):
+            url = yarl.URL(str_or_url)
+            if url.host != LOCAL_HOST:
+                url = yarl.URL.build(scheme="http", host=LOCAL_HOST, port=port, path=f"/{url.host}{url.raw_path}",
+                                     query_string=url.raw_query_string, encoded=True)
+            return await original_request(session, method, url, **kwargs)
+
+        def _process_payload(client, response: str):
+            stats["received"] += 1
+            return original_process(client, response)
+
+        aiohttp.ClientSession._request = _request
+        ess_client.EventClient._process_payload = _process_payload
+        ess_client.default_endpoints = lambda: (original_endpoints()[0],
+                                                yarl.URL(f"ws://{LOCAL_HOST}:{port}{ESS_PATH}"))
+        return self
+
+    def __exit__(self, *exc):
+        (aiohttp.ClientSession._request, ess_client.default_endpoints,
+         ess_client.EventClient._process_payload) = self._originals
+
+
+def synth(out_dir: str, char_count: int, kills: int, duration: float, seed_value: int = 0):
+    """
+    Write a synthetic capture: a server restart burst logging in every tracked character, churn over the
+    duration, and an anomaly on Connery - Indar with a stream of aircraft, ground and off-zone vehicle kills.
+    """
+    rng = random.Random(seed_value)
+    chars = [5_428_000_000_000_000_000 + i for i in range(char_count)]
+    stamp = int(time.time())
+    events = []
+
+    def payload(t, data):
+        data = {k: str(v) for k, v in data.items()}
+        data["timestamp"] = str(stamp + int(t))
+        events.append((t, json.dumps({"payload": data, "service": "event", "type": "serviceMessage"})))
+
+    for c_id in chars:
+        payload(rng.uniform(0, 2), {"event_name": "PlayerLogin", "character_id": c_id, "world_id": census.WORLD_ID})
+    for _ in range(char_count):
+        event = rng.choice(("PlayerLogin", "PlayerLogout"))
+        payload(rng.uniform(2, duration), {"event_name": event, "character_id": rng.choice(chars),
+                                           "world_id": census.WORLD_ID})
+    metagame = {"event_name": "MetagameEvent", "experience_bonus": "25.0", "faction_nc": "33.0",
+                "faction_tr": "33.0", "faction_vs": "33.0", "instance_id": 4242, "metagame_event_id": 228,
+                "world_id": 1, "zone_id": 2}
+    payload(1, dict(metagame, metagame_event_state=135, metagame_event_state_name="started"))
+    aircraft, ground = (7, 8, 9, 10, 11, 14), (1, 2, 3, 4, 5, 6, 12, 15)
+    for _ in range(kills):
+        world, zone = rng.choice(((1, 2), (1, 2), (1, 4), (10, 2), (13, 6), (17, 8)))
+        vehicles = aircraft if rng.random() < 0.6 else ground
+        payload(rng.uniform(2, duration), {
+            "event_name": "VehicleDestroy", "world_id": world, "zone_id": zone, "facility_id": 0,
+            "attacker_character_id": rng.randint(1, 500), "attacker_loadout_id": 0,
+            "attacker_vehicle_id": rng.choice(vehicles), "attacker_weapon_id": 0,
+            "attacker_team_id": rng.randint(1, 3), "character_id": rng.randint(1, 500),
+            "faction_id": rng.randint(1, 3), "team_id": rng.randint(1, 3), "vehicle_id": rng.choice(vehicles)})
+    payload(duration, dict(metagame, metagame_event_state=138, metagame_event_state_name="ended"))
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "events.jsonl"), "w") as f:
+        for t, data in sorted(events):
+            f.write(json.dumps({"t": round(t, 4), "payload": data}) + "\n")
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump({"recorded": stamp, "tracked": chars, "synthetic": True}, f)
+    print(f"Wrote {len(events)} events for {char_count} characters to {out_dir}")
+
+
+def players_map(char_ids: list[int]) -> dict:
+    """char_id: FakePlayer index, three characters per player"""
+    chars_players_map = dict()
+    for i in range(0, len(char_ids), 3):
+        player = FakePlayer(char_ids[i:i + 3])
+        for c_id in player.ig_ids:
+            chars_players_map[c_id] = player
+    return chars_players_map
+
+
+class AnomalyStandIn(AnomalyCog):
+    """AnomalyCog with just the state its websocket handlers use, without a bot or discord.
+    Without a loop to open the kill-feed websocket on, only kill routing is exercised."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None):
+        self.bot = SimpleNamespace(loop=loop)
+        self.events = {}
+        self.zone_events = {}
+        self.kill_client = None
+        self.vehicle_destroy_trigger = auraxium.Trigger(event=auraxium.event.VehicleDestroy, worlds=[],
+                                                        action=self.vehicle_destroy_event_handler)
+        self.update_lock = asyncio.Lock()
+        self.renders = 0
+        self.seen = {}  # Every anomaly rendered, including ended ones
+
+    def update_event_embed(self, anom):
+        self.renders += 1
+        self.seen[anom.unique_id] = anom
+
+    def update_kill_subscription(self):
+        if self.bot.loop:
+            super().update_kill_subscription()
+
+
+def anomaly_client(stand_in: AnomalyStandIn) -> auraxium.event.EventClient:
+    """EventClient with AnomalyCog's metagame trigger, calling its handler on stand_in.
+    stand_in opens its own kill-feed websocket while anomalies are active."""
+    client = auraxium.event.EventClient(service_id=cfg.general['api_key'])
+    client.add_trigger(auraxium.Trigger(event=auraxium.event.MetagameEvent, worlds=WORLD_DICT.keys(),
+                                        conditions=[lambda evt: evt.metagame_event_id in ANOMALY_IDS and
+                                                    evt.world_id in WORLD_DICT.keys()],
+                                        action=stand_in.anomaly_event_handler))
+    return client
+
+
+async def loop_lag(samples: list[float], stop: asyncio.Event, interval: float = 0.01):
+    """Record how late the loop wakes a sleeping task, a measure of how long other work blocks it"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def record(args):
+    tracked = [int(c_id) for c_id in args.chars.split(",")] if args.chars else []
+    with Recorder(args.out, tracked) as recorder:
+        stand_in = AnomalyStandIn(asyncio.get_running_loop())
+        clients = [anomaly_client(stand_in)]
+        login_client = auraxium.event.EventClient(service_id=cfg.general['api_key'])
+        for event in (auraxium.event.PlayerLogin, auraxium.event.PlayerLogout):
+            login_client.add_trigger(census.CharacterTrigger(event, characters=tracked or None,
+                                                             worlds=[census.WORLD_ID], action=lambda evt: None))
+        clients.append(login_client)
+        chars_players_map = players_map(tracked)
+        accounts.account_char_ids = {}
+        end = time.monotonic() + args.duration
+        while (remaining := end - time.monotonic()) > 0:
+            if tracked:
+                await census.online_status_rest(chars_players_map)
+            await asyncio.sleep(min(args.poll_interval, remaining))
+        if stand_in.kill_client:
+            clients.append(stand_in.kill_client)
+        for client in clients:
+            await client.close()
+        await census.close()
+    print(f"Recorded {recorder.counts['events']} websocket payloads and {recorder.counts['rest']} HTTP responses "
+          f"to {args.out}")
+
+
+async def replay(args):
+    server = ReplayServer(args.capture, args.speed, clients=2)  # Census and anomaly metagame websockets
+    await server.start()
+    tracked = server.meta.get("tracked") or sorted({
+        int(data["payload"]["character_id"]) for data in (json.loads(p) for _, p in server.events)
+        if data.get("payload", {}).get("event_name") in ("PlayerLogin", "PlayerLogout")})
+    chars_players_map = players_map(tracked)
+    accounts.account_char_ids = {}
+    lag, stop = [], asyncio.Event()
+    rest_polls = []
+
+    async def poll_rest():
+        while not stop.is_set():
+            start = time.perf_counter()
+            if await census.online_status_rest(chars_players_map):
+                rest_polls.append(time.perf_counter() - start)
+            await asyncio.sleep(args.poll_interval / (args.speed or 1))
+
+    with server:
+        stand_in = AnomalyStandIn(asyncio.get_running_loop())
+        anomaly = anomaly_client(stand_in)
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(census.online_status_updater(chars_players_map)),
+                 asyncio.create_task(loop_lag(lag, stop))]
+        if server.responses:
+            tasks.append(asyncio.create_task(poll_rest()))
+        # Every websocket streamed to the end, and clients have processed what they were sent
+        while server.stats["streams_finished"] < max(2, server.stats["connections"]):
+            await asyncio.sleep(0.01)
+        received = -1
+        while received != server.stats["received"]:
+            received = server.stats["received"]
+            await asyncio.sleep(0.1)
+        while census.event_queue_stats()["depth"]:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await census.EVENT_CLIENT.close()
+        await anomaly.close()
+        if stand_in.kill_client:
+            await stand_in.kill_client.close()
+        await census.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await server.close()
+
+    queue = census.event_queue_stats()
+    lag.sort()
+    kills = sum(anom.total_kills for anom in stand_in.seen.values())
+    speed = f"{args.speed}x" if args.speed else "max"
+    print(f"Replayed {len(server.events)} payloads at {speed} speed in {elapsed:.2f}s, "
+          f"{server.stats['sent']} sent over {server.stats['connections']} websockets "
+          f"({server.stats['sent'] / elapsed:.0f} payloads/s), max send lag {server.stats['max_send_lag'] * 1000:.1f}ms")
+    print(f"Census events: {queue['received']} received, {queue['coalesced']} coalesced, {queue['dropped']} dropped, "
+          f"{queue['processed']} processed, max queue depth {queue['max_depth']}, "
+          f"{sum(1 for p in set(chars_players_map.values()) if p.online_id)} players online")
+    print(f"Anomalies: {len(stand_in.seen)} seen, {kills} kills counted, {stand_in.renders} embed updates")
+    if lag:
+        print(f"Loop lag: p50 {lag[len(lag) // 2] * 1000:.2f}ms, p99 {lag[int(len(lag) * 0.99)] * 1000:.2f}ms, "
+              f"max {lag[-1] * 1000:.2f}ms")
+    if server.responses:
+        mean = f"{statistics.fmean(rest_polls) * 1000:.1f}ms mean" if rest_polls else "none succeeded"
+        print(f"REST polls: {len(rest_polls)} ({mean}), {server.stats['rest_hits']} responses served, "
+              f"{server.stats['rest_misses']} requests not in the capture")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Record live traffic, needs network access and an api key")
+    rec.add_argument('--out', required=True, type=str)
+    rec.add_argument('--duration', default=600, type=float, help="Seconds to record")
+    rec.add_argument('--chars', default="", type=str,
+                     help="Comma separated character ids to track, all logins on the server are recorded if omitted")
+    rec.add_argument('--poll-interval', default=15, type=float, help="Seconds between REST online checks")
+    syn = sub.add_parser("synth", help="Write a synthetic capture")
+    syn.add_argument('--out', required=True, type=str)
+    syn.add_argument('--chars', default=2000, type=int, help="Tracked characters")
+    syn.add_argument('--kills', default=20000, type=int, help="Vehicle destroy events")
+    syn.add_argument('--duration', default=300, type=float, help="Seconds of traffic")
+    rep = sub.add_parser("replay", help="Replay a capture from a local stand-in")
+    rep.add_argument('--capture', required=True, type=str)
+    rep.add_argument('--speed', default=1.0, type=float, help="Replay speed factor, 0 for as fast as possible")
+    rep.add_argument('--poll-interval', default=15, type=float, help="Seconds between REST online checks")
+    args = ap.parse_args()
+
+    if args.command == "synth":
+        return synth(args.out, args.chars, args.kills, args.duration)
+    if args.command == "replay":
+        cfg.general['api_key'] = cfg.general.get('api_key') or 's:example'
+    for logger in ('fs_bot', 'auraxium', 'aiohttp'):  # Login / logout and per event logs
+        logging.getLogger(logger).setLevel(logging.WARNING)
+    asyncio.run(record(args) if args.command == "record" else replay(args))
+
+
+if __name__ == '__main__':
+    main()
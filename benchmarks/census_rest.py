@@ -0,0 +1,124 @@
+"""
+Measures census.online_status_rest poll latency against tracked roster size, chunked and as a single query.
+
+Runs against a local stand-in for the Census character endpoint, which adds a fixed plus a per-id delay to each
+response and, like real servers, rejects URLs over a length limit.
+Usage: python -m benchmarks.census_rest --rosters 100,500,1000,2000,5000 --polls 5
+"""
+
+# External Imports
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+import yarl
+from aiohttp import web
+
+# Internal Imports, in main.py's import order
+import modules.config as cfg
+import modules.accounts_handler as accounts
+import modules.census as census
+
+MAX_URL_LENGTH = 8192
+
+
+class FakePlayer:
+    """Just the attributes census.login / logout use"""
+
+    def __init__(self, ig_ids):
+        self.ig_ids = ig_ids
+        self.online_id = None
+        self.online_name = "Benchmark"
+        self.match = None
+
+
+def census_app(online: set[int], base_delay: float, per_id_delay: float) -> web.Application:
+    async def character(request: web.Request):
+        if len(str(request.rel_url)) > MAX_URL_LENGTH:
+            return web.Response(status=414, text="URI Too Long")
+        char_ids = request.query.get("character_id", "").split(",")
+        await asyncio.sleep(base_delay + per_id_delay * len(char_ids))
+        char_list = [{"character_id": c_id,
+                      "character_id_join_characters_online_status": {
+                          "online_status": str(census.WORLD_ID) if int(c_id) in online else "0"}}
+                     for c_id in char_ids]
+        return web.json_response({"character_list": char_list, "returned": len(char_list)})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", character)
+    return app
+
+
+async def poll_latency(chars_players_map: dict, polls: int) -> tuple[float, bool]:
+    """Mean latency of steady state polls, after an initial poll dispatching every login"""
+    for player in chars_players_map.values():
+        player.online_id = None
+    ok = await census.online_status_rest(chars_players_map)
+    samples = []
+    for _ in range(polls):
+        start = time.perf_counter()
+        ok = await census.online_status_rest(chars_players_map) and ok
+        samples.append(time.perf_counter() - start)
+    return statistics.fmean(samples), ok
+
+
+async def run(args):
+    rng = random.Random(0)
+    rosters = [int(size) for size in args.rosters.split(",")]
+    all_ids = [5_428_000_000_000_000_000 + i for i in range(max(rosters))]
+    online = {c_id for c_id in all_ids if rng.random() < args.online}
+
+    # Raise aiohttp's own request line limit, so long URLs reach the handler and get a 414 like Census
+    runner = web.AppRunner(census_app(online, args.base_delay, args.per_id_delay),
+                           max_line_size=1 << 20)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client = await census.get_client()
+    client.endpoints = [yarl.URL(f"http://127.0.0.1:{port}")]
+    accounts.account_char_ids = {}
+    chunk_size = census.REST_CHUNK_SIZE
+    try:
+        print(f"Poll latency, {args.polls} polls per size, chunk size {chunk_size}:")
+        print(f"{'roster':>8}{'single (ms)':>14}{'chunked (ms)':>14}")
+        for size in rosters:
+            ids = all_ids[:size]
+            chars_players_map = dict()
+            for i in range(0, size, 3):
+                player = FakePlayer(ids[i:i + 3])
+                for c_id in player.ig_ids:
+                    chars_players_map[c_id] = player
+
+            census.REST_CHUNK_SIZE = size
+            single, single_ok = await poll_latency(chars_players_map, args.polls)
+            census.REST_CHUNK_SIZE = chunk_size
+            chunked, chunked_ok = await poll_latency(chars_players_map, args.polls)
+            single = f"{single * 1000:.1f}" if single_ok else "failed"
+            chunked = f"{chunked * 1000:.1f}" if chunked_ok else "failed"
+            print(f"{size:>8}{single:>14}{chunked:>14}")
+    finally:
+        await census.close()
+        await runner.cleanup()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rosters', default="100,500,1000,2000,5000", type=str, help="Comma separated roster sizes")
+    ap.add_argument('--polls', default=5, type=int)
+    ap.add_argument('--online', default=0.1, type=float, help="Fraction of characters online")
+    ap.add_argument('--base-delay', default=0.08, type=float, help="Seconds added to every response")
+    ap.add_argument('--per-id-delay', default=0.0002, type=float, help="Seconds added per character id queried")
+    args = ap.parse_args()
+
+    cfg.general['api_key'] = cfg.general.get('api_key') or 's:example'
+    for logger in ('fs_bot', 'auraxium', 'aiohttp'):  # Login / logout, failed query and request logs
+        logging.getLogger(logger).setLevel(logging.CRITICAL)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
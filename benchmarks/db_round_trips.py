@@ -0,0 +1,137 @@
+"""
+Counts the MongoDB commands sent by the modules.database primitives, compared to the previous
+count_documents + operation implementations.
+
+Runs against a scratch database on a real MongoDB server, which is dropped afterwards.
+Usage: python -m benchmarks.db_round_trips --url mongodb://localhost:27017 --iterations 100
+"""
+
+# External Imports
+import argparse
+from pymongo import monitoring
+
+# Internal Imports
+import modules.database as db
+
+SCRATCH_CLUSTER = "fs_bot_benchmark"
+COLLECTION = "users"
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts every command sent to the server"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Previous implementations, kept here as the comparison baseline
+
+def legacy_set_element(collection, e_id, data):
+    if db._collections[collection].count_documents({"_id": e_id}) != 0:
+        db._collections[collection].replace_one({"_id": e_id}, data)
+    else:
+        db._collections[collection].insert_one(data)
+
+
+def legacy_set_field(collection, e_id, doc):
+    if db._collections[collection].count_documents({"_id": e_id}) != 0:
+        db._collections[collection].update_one({"_id": e_id}, {"$set": doc})
+
+
+def legacy_push_element(collection, e_id, doc):
+    if db._collections[collection].count_documents({"_id": e_id}) != 0:
+        db._collections[collection].update_one({"_id": e_id}, {"$push": doc})
+
+
+def legacy_unset_field(collection, e_id, doc):
+    if db._collections[collection].count_documents({"_id": e_id}) != 0:
+        db._collections[collection].update_one({"_id": e_id}, {"$unset": doc})
+
+
+def legacy_get_element(collection, e_id):
+    if db._collections[collection].count_documents({"_id": e_id}) == 0:
+        return
+    return db._collections[collection].find_one({"_id": e_id})
+
+
+def legacy_get_field(collection, e_id, specific):
+    if db._collections[collection].count_documents({"_id": e_id}) == 0:
+        return
+    return db._collections[collection].find_one({"_id": e_id}, {"_id": False, specific: True})[specific]
+
+
+def legacy_get_last_element(collection):
+    if db._collections[collection].count_documents({}) == 0:
+        return
+    return db._collections[collection].find(filter={}, limit=1, sort=[('_id', -1)])[0]
+
+
+def legacy_remove_element(collection, e_id):
+    if db._collections[collection].count_documents({"_id": e_id}) != 0:
+        db._collections[collection].delete_one({"_id": e_id})
+
+
+def _operations(set_element, set_field, push_element, unset_field, get_element, get_field, get_last_element,
+                remove_element):
+    """Build the list of (name, call) pairs for one set of implementations"""
+    return [
+        ("set_element", lambda i: set_element(COLLECTION, i, {"_id": i, "name": f"player{i}", "history": []})),
+        ("set_field", lambda i: set_field(COLLECTION, i, {"name": f"renamed{i}"})),
+        ("push_element", lambda i: push_element(COLLECTION, i, {"history": i})),
+        ("unset_field", lambda i: unset_field(COLLECTION, i, {"history": ""})),
+        ("get_element", lambda i: get_element(COLLECTION, i)),
+        ("get_field", lambda i: get_field(COLLECTION, i, "name")),
+        ("get_last_element", lambda i: get_last_element(COLLECTION)),
+        ("remove_element", lambda i: remove_element(COLLECTION, i)),
+    ]
+
+
+def run(counter: CommandCounter, operations, iterations: int) -> dict[str, int]:
+    results = {}
+    for name, call in operations:
+        counter.count = 0
+        for i in range(iterations):
+            call(i)
+        results[name] = counter.count
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--url', default='mongodb://localhost:27017', type=str)
+    ap.add_argument('--iterations', default=100, type=int)
+    args = ap.parse_args()
+
+    counter = CommandCounter()
+    monitoring.register(counter)  # must be registered before the client is created
+    db.init({"url": args.url, "cluster": SCRATCH_CLUSTER, "collections": {COLLECTION: COLLECTION}})
+
+    try:
+        legacy = run(counter, _operations(legacy_set_element, legacy_set_field, legacy_push_element,
+                                          legacy_unset_field, legacy_get_element, legacy_get_field,
+                                          legacy_get_last_element, legacy_remove_element), args.iterations)
+        current = run(counter, _operations(db.set_element, db.set_field, db.push_element, db.unset_field,
+                                           db.get_element, db.get_field, db.get_last_element, db.remove_element),
+                      args.iterations)
+    finally:
+        db._collections[COLLECTION].database.client.drop_database(SCRATCH_CLUSTER)
+
+    print(f"Commands sent over {args.iterations} calls each:")
+    print(f"{'operation':<18}{'previous':>10}{'current':>10}{'ratio':>8}")
+    for name in legacy:
+        print(f"{name:<18}{legacy[name]:>10}{current[name]:>10}{current[name] / legacy[name]:>8.2f}")
+    total_legacy, total_current = sum(legacy.values()), sum(current.values())
+    print(f"{'total':<18}{total_legacy:>10}{total_current:>10}{total_current / total_legacy:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
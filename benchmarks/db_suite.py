@@ -0,0 +1,94 @@
+"""
+Benchmark suite for the hot modules.database calls, on the benchmarks.harness stand-in.
+
+Results can be saved, and compared against a previous run to flag regressions before deploying.
+Usage: python -m benchmarks.db_suite [--url mongodb://localhost:27017] [--save out.json] [--compare base.json]
+"""
+
+# External Imports
+import argparse
+import json
+import random
+
+# Internal Imports, harness first as it imports modules in main.py's order
+from benchmarks import harness
+import modules.database as db
+import modules.account_usage as account_usage
+import modules.match_aggregates as match_aggregates
+import classes
+
+REGRESSION_THRESHOLD = 1.2  # Ratio of mean times over the baseline flagged as a regression
+
+
+def suite(users: int, iterations: int) -> dict[str, tuple]:
+    """Build the (call, iterations) pairs to time, by name"""
+    rng = random.Random(2)
+    ids = [rng.randint(1, users) for _ in range(iterations)]
+
+    def get_all_from_db():
+        classes.PlayerStats._all_player_stats.clear()
+        return classes.PlayerStats.get_all_from_db()
+
+    return {
+        "set_element": (lambda i: db.set_element("users", ids[i], harness.user_doc(ids[i], rng)), iterations),
+        "get_element": (lambda i: db.get_element("users", ids[i]), iterations),
+        "stats_aggregates": (lambda i: match_aggregates.get_player_aggregates(ids[i]), iterations),
+        "stats_pipeline": (lambda i: match_aggregates.query_player_stats(ids[i]), iterations),
+        "get_usages_period": (lambda i: account_usage.get_usages_period(
+            ids[i], harness.START_STAMP, harness.START_STAMP + 10 * 3600), iterations),
+        "get_all_users": (lambda i: harness.load_players(), max(1, iterations // 20)),
+        "get_all_from_db": (lambda i: get_all_from_db(), max(1, iterations // 20)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--url', default=None, type=str, help="MongoDB url, mongomock is used if omitted")
+    ap.add_argument('--users', default=2000, type=int)
+    ap.add_argument('--matches', default=20000, type=int)
+    ap.add_argument('--usages', default=20, type=int, help="Account usages per user")
+    ap.add_argument('--iterations', default=200, type=int)
+    ap.add_argument('--save', default=None, type=str, help="Write results to this json file")
+    ap.add_argument('--compare', default=None, type=str, help="Compare against results from a previous --save")
+    ap.add_argument('--threshold', default=REGRESSION_THRESHOLD, type=float,
+                    help="Ratio of mean times over the baseline flagged as a regression")
+    args = ap.parse_args()
+
+    harness.boot(args.url)
+    try:
+        harness.seed(args.users, args.matches, args.usages)
+        harness.load_players()
+        harness.timed(lambda i: match_aggregates.backfill(), 1)
+        results = {name: harness.timed(call, count) for name, (call, count) in suite(args.users,
+                                                                                     args.iterations).items()}
+    finally:
+        if args.url:
+            harness.teardown()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print(f"{args.users} users, {args.matches} matches, {args.users * args.usages} account usages:")
+    print(f"{'call':<20}{'n':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'vs base':>10}")
+    regressions = []
+    for name, r in results.items():
+        ratio = ""
+        if name in baseline:
+            ratio = r["mean_ms"] / baseline[name]["mean_ms"]
+            if ratio > args.threshold:
+                regressions.append(name)
+            ratio = f"{ratio:.2f}x"
+        print(f"{name:<20}{r['iterations']:>6}{r['mean_ms']:>10.3f}{r['p50_ms']:>10.3f}"
+              f"{r['p95_ms']:>10.3f}{r['max_ms']:>10.3f}{ratio:>10}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        raise SystemExit(f"Regressions over {args.threshold}x baseline: {', '.join(regressions)}")
+
+
+if __name__ == '__main__':
+    main()
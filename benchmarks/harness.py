@@ -0,0 +1,124 @@
+"""
+Boots the database layer against a local stand-in, seeds it with realistic volumes, and times calls.
+
+With no url, modules.database is initialised on an in-process mongomock client (pip install mongomock),
+so benchmarks can run without the production cluster.  Pass a url to run against a real MongoDB server instead,
+in which case the scratch database is dropped by teardown().
+"""
+
+# External Imports
+import asyncio
+import random
+import statistics
+import time
+
+# Internal Imports, in main.py's import order
+import modules.config as cfg
+import modules.accounts_handler
+import modules.database as db
+import classes
+
+SCRATCH_CLUSTER = "fs_bot_benchmark"
+START_STAMP = 1_600_000_000
+
+
+def boot(url: str = None):
+    """Initialise modules.database on mongomock, or on a scratch database at url"""
+    client = None
+    if not url:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("mongomock is required to benchmark without a MongoDB server: pip install mongomock")
+        client = mongomock.MongoClient()
+    for collection in cfg.database["collections"]:
+        cfg.database["collections"][collection] = collection
+    db.init({"url": url, "cluster": SCRATCH_CLUSTER, "collections": dict(cfg.database["collections"])}, client=client)
+
+
+def teardown():
+    db._collections["users"].database.client.drop_database(SCRATCH_CLUSTER)
+
+
+def user_doc(p_id: int, rng: random.Random) -> dict:
+    doc = {"_id": p_id, "name": f"Player{p_id}", "is_registered": True,
+           "skill_level": rng.choice([level.name for level in classes.SkillLevel]),
+           "lobby_ping_pref": rng.randint(0, 2), "lobby_ping_freq": 30}
+    if rng.random() < 0.7:
+        base = 5_400_000_000_000_000_000 + p_id * 10
+        doc["ig_ids"] = [base + i for i in range(4)]
+        doc["ig_names"] = [f"Player{p_id}{suffix}" for suffix in ("VS", "NC", "TR", "NS")]
+    return doc
+
+
+def user_stats_doc(p_id: int, match_ids: list[int], rng: random.Random) -> dict:
+    return {"_id": p_id, "matches": match_ids,
+            "elo_history": {str(m_id): rng.uniform(-30, 30) for m_id in match_ids},
+            "elo": rng.uniform(800, 1600), "match_wins": rng.randint(0, 50), "match_losses": rng.randint(0, 50),
+            "match_draws": rng.randint(0, 5), "nc_round_wins": rng.randint(0, 100), "tr_round_wins": rng.randint(0, 100),
+            "nc_round_losses": rng.randint(0, 100), "tr_round_losses": rng.randint(0, 100),
+            "current_rank": "Unranked", "last_rank": "Unranked", "last_rank_update": 0}
+
+
+def match_doc(m_id: int, player_count: int, rng: random.Random) -> dict:
+    players = rng.sample(range(1, player_count + 1), rng.randint(2, 4))
+    split = rng.randint(1, len(players) - 1)
+    start = START_STAMP + m_id * 600
+    return {"_id": m_id, "type": "BaseMatch", "start_stamp": start, "end_stamp": start + rng.randint(60, 3600),
+            "end_condition": "EMPTY", "owner": players[0], "channel_id": 0,
+            "current_players": players[:split], "previous_players": players[split:],
+            "match_log": [(start + n, f"Log line {n} for match {m_id}") for n in range(40)]}
+
+
+def usage_doc(p_id: int, index: int, rng: random.Random) -> dict:
+    start = START_STAMP + index * 3600 + rng.randint(0, 3000)
+    return {"account_id": rng.randint(1, 24), "user_id": p_id, "start_time": start,
+            "end_time": start + rng.randint(600, 7200), "game_logins": [start + 60]}
+
+
+def seed(users: int = 2000, matches: int = 20000, usages_per_user: int = 20, seed_value: int = 0):
+    """Fill the collections with synthetic documents shaped like the ones the bot writes"""
+    rng = random.Random(seed_value)
+    match_docs = [match_doc(m_id, users, rng) for m_id in range(matches)]
+    player_matches = {}
+    for match in match_docs:
+        for p_id in match["current_players"] + match["previous_players"]:
+            player_matches.setdefault(p_id, []).append(match["_id"])
+
+    db._collections["users"].insert_many([user_doc(p_id, rng) for p_id in range(1, users + 1)])
+    db._collections["user_stats"].insert_many([user_stats_doc(p_id, player_matches.get(p_id, []), rng)
+                                               for p_id in range(1, users + 1)])
+    db._collections["matches"].insert_many(match_docs)
+    db._collections["account_usages"].insert_many([usage_doc(p_id, i, rng) for p_id in range(1, users + 1)
+                                                   for i in range(usages_per_user)])
+
+
+def timed(call, iterations: int) -> dict:
+    """
+    Run call(i) for each iteration, awaiting it if it returns a coroutine.
+
+    :return: Timing summary in milliseconds.
+    """
+    loop = asyncio.new_event_loop()
+    samples = []
+    try:
+        for i in range(iterations):
+            start = time.perf_counter()
+            result = call(i)
+            if asyncio.iscoroutine(result):
+                loop.run_until_complete(result)
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        loop.close()
+    samples.sort()
+    return {"iterations": iterations, "mean_ms": statistics.fmean(samples), "p50_ms": samples[len(samples) // 2],
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))], "max_ms": samples[-1]}
+
+
+def load_players():
+    """Load every user into classes.Player, as main.py does at startup"""
+    classes.Player._all_players.clear()
+    for name_dict in classes.Player._name_checking:
+        name_dict.clear()
+    classes.Player._char_id_index.clear()
+    return db.get_all_elements(classes.Player.new_from_data, "users", projection=classes.Player.DB_PROJECTION)
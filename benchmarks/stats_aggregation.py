@@ -0,0 +1,100 @@
+"""
+Compares computing /stats in the bot process (fetching every match of a player and summing in Python)
+against the modules.match_aggregates server side aggregation pipeline.
+
+Runs against a scratch database on a real MongoDB server, which is dropped afterwards.
+Usage: python -m benchmarks.stats_aggregation --url mongodb://localhost:27017 --matches 10000 --players 200
+"""
+
+# External Imports
+import argparse
+import asyncio
+import random
+import time
+
+# Internal Imports
+import modules.database as db
+import modules.match_aggregates as match_aggregates
+
+SCRATCH_CLUSTER = "fs_bot_benchmark"
+COLLECTION = "matches"
+
+
+def seed_matches(match_count: int, player_count: int, log_lines: int):
+    """Insert synthetic ended matches, with match logs sized like real ones"""
+    rng = random.Random(0)
+    docs = []
+    for i in range(match_count):
+        players = rng.sample(range(1, player_count + 1), rng.randint(2, 4))
+        split = rng.randint(1, len(players) - 1)
+        start = 1_600_000_000 + i * 600
+        docs.append({"_id": i, "type": "BaseMatch",
+                     "start_stamp": start, "end_stamp": start + rng.randint(60, 3600),
+                     "current_players": players[:split], "previous_players": players[split:],
+                     "match_log": [(start + n, f"Log line {n} for match {i}") for n in range(log_lines)]})
+    db._collections[COLLECTION].insert_many(docs)
+
+
+def python_stats(player_id: int) -> dict | None:
+    """The previous /stats implementation: fetch full documents, then loop over them"""
+    matches = list(db.find_elements(COLLECTION, {"$or": [{"current_players": player_id},
+                                                         {"previous_players": player_id}]}))
+    if not matches:
+        return None
+    total_duel_sec = 0
+    partners = {}
+    for match in matches:
+        total_duel_sec += match["end_stamp"] - match["start_stamp"]
+        for p_id in match["current_players"] + match["previous_players"]:
+            if p_id != player_id:
+                partners[p_id] = partners.get(p_id, 0) + 1
+    top = sorted(partners.items(), key=lambda item: (-item[1], item[0]))[:3]
+    return {"_id": player_id, "total_matches": len(matches), "total_duel_sec": total_duel_sec,
+            "partners": {str(p_id): count for p_id, count in top}}
+
+
+async def timed(call, player_ids) -> tuple[float, list]:
+    results = []
+    start = time.perf_counter()
+    for p_id in player_ids:
+        results.append(await call(p_id))
+    return time.perf_counter() - start, results
+
+
+async def run(args):
+    seed_matches(args.matches, args.players, args.log_lines)
+    player_ids = random.Random(1).sample(range(1, args.players + 1), min(args.queries, args.players))
+
+    async def python_call(p_id):
+        return await db.async_db_call(python_stats, p_id)
+
+    python_time, python_results = await timed(python_call, player_ids)
+    pipeline_time, pipeline_results = await timed(match_aggregates.query_player_stats, player_ids)
+    if python_results != pipeline_results:
+        raise RuntimeError("Pipeline results differ from the Python loop!")
+
+    print(f"{args.matches} matches, {args.players} players, {len(player_ids)} /stats queries:")
+    print(f"{'method':<12}{'total (s)':>12}{'per query (ms)':>16}")
+    for name, elapsed in (("python", python_time), ("pipeline", pipeline_time)):
+        print(f"{name:<12}{elapsed:>12.3f}{elapsed / len(player_ids) * 1000:>16.2f}")
+    print(f"speedup: {python_time / pipeline_time:.2f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--url', default='mongodb://localhost:27017', type=str)
+    ap.add_argument('--matches', default=10000, type=int)
+    ap.add_argument('--players', default=200, type=int)
+    ap.add_argument('--queries', default=50, type=int)
+    ap.add_argument('--log-lines', default=40, type=int)
+    args = ap.parse_args()
+
+    db.init({"url": args.url, "cluster": SCRATCH_CLUSTER, "collections": {COLLECTION: COLLECTION}})
+    try:
+        asyncio.run(run(args))
+    finally:
+        db._collections[COLLECTION].database.client.drop_database(SCRATCH_CLUSTER)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,7 @@ from display import AllStrings as disp, embeds, views
 import modules.tools as tools
 from classes.players import Player, ActivePlayer
 import modules.database as db
+import modules.match_aggregates as match_aggregates
 import modules.accounts_handler as accounts
 from classes.player_stats import PlayerStats
 
@@ -453,7 +454,13 @@ class BaseMatch:
             )
 
             # Update DB with current players, then remove players
-            await db.async_db_call(db.set_element, 'matches', self.id, self.get_end_data())
+            end_data = self.get_end_data()
+            await db.async_db_call(db.set_element, 'matches', self.id, end_data)
+            try:  # /stats aggregates aren't critical, don't let them block the match from ending
+                await match_aggregates.update_from_match(end_data)
+            except Exception as e:
+                log.error("Couldn't update match aggregates for Match %s", self.id_str, exc_info=e)
+            await db.async_flush_writes()  # Write stats queued during the match end
             with self.thread.typing():
                 leave_coroutines = [self.leave_match(player) for player in self.__players]
                 await asyncio.gather(*leave_coroutines)
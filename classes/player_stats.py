@@ -55,9 +55,10 @@ class PlayerStats:
 
     @classmethod
     async def push_all_to_db(cls):
-        """Push all PlayerStats objects to database"""
+        """Push all PlayerStats objects to database, as a single bulk write"""
         coroutines = [player_stats.push_to_db() for player_stats in cls.get_all()]
         await asyncio.gather(*coroutines)
+        await db.async_flush_writes()
 
     def __init__(self, p_id, p_name, data: dict | None = None):
         self.__id = p_id
@@ -119,7 +120,8 @@ class PlayerStats:
         return data
 
     async def push_to_db(self):
-        await db.async_db_call(db.set_element, cfg.database['collections']['user_stats'], self.__id, self._get_data())
+        """Queue the stats in the write-behind queue, written on the next flush"""
+        db.queue_set_element(cfg.database['collections']['user_stats'], self.__id, self._get_data())
 
     @property
     def id(self):
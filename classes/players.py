@@ -98,6 +98,12 @@ class Player:
 
     _all_players = dict()
     _name_checking = [dict(), dict(), dict(), dict()]
+    _char_id_index = dict()  # char_id: Player across all factions, kept in step with _name_checking
+
+    # Fields read by new_from_data, used to project the users collection on load
+    DB_PROJECTION = {'name': True, 'is_registered': True, 'skill_level': True, 'ig_ids': True, 'ig_names': True,
+                     'timeout': True, 'hidden': True, 'pref_factions': True, 'req_skill_levels': True,
+                     'lobby_ping_pref': True, 'lobby_ping_freq': True}
 
     @classmethod
     def get(cls, p_id) -> 'Player':
@@ -113,14 +119,19 @@ class Player:
     def name_check_add(cls, p):
         for i in range(4 if p.has_ns_character else 3):
             cls._name_checking[i][p.ig_ids[i]] = p
+            cls._char_id_index[p.ig_ids[i]] = p
+        census.schedule_subscription_update()
 
     @classmethod
     def name_check_remove(cls, p):
         for i in range(4 if p.has_ns_character else 3):
             try:
                 del cls._name_checking[i][p.ig_ids[i]]
+                if cls._char_id_index.get(p.ig_ids[i]) is p:
+                    del cls._char_id_index[p.ig_ids[i]]
             except KeyError:
                 log.warning(f"name_check_remove KeyError for player [id={p.id}], [key={p.ig_ids[i]}]")
+        census.schedule_subscription_update()
 
     @classmethod
     def get_all_players(cls):
@@ -149,11 +160,10 @@ class Player:
         return could_ping
 
     @classmethod
-    def map_chars_to_players(cls):
-        dct = {}
-        for i in cls._name_checking:
-            dct.update(i)
-        return dct
+    def map_chars_to_players(cls) -> dict:
+        """Live char_id: Player index of all registered characters.  Updated in place as players register,
+        so callers get current data without copying, and must not modify it."""
+        return cls._char_id_index
 
     def __init__(self, p_id, name):
         if not re.match(cfg.name_regex, name):
@@ -239,33 +249,34 @@ class Player:
 
     async def db_update(self, arg):
         """Update a specific users database element.  Options are name, register, account, timeout,
-         skill_level, req_skill_levels, pref_factions, pref_factions, hidden: """
+         skill_level, req_skill_levels, pref_factions, pref_factions, hidden:
+         Updates are queued in the write-behind queue, and written on the next flush."""
         match arg:
             case 'name':
-                await db.async_db_call(db.set_field, 'users', self.id, {'name', self.__name})
+                db.queue_set_field('users', self.id, {'name': self.__name})
             case 'register':
-                await db.async_db_call(db.set_field, 'users', self.id, {'is_registered': self.__is_registered})
+                db.queue_set_field('users', self.id, {'is_registered': self.__is_registered})
             case 'account':
                 doc = {'ig_ids': self.__ig_ids, 'ig_names': self.__ig_names}
                 if self.has_own_account:
-                    await db.async_db_call(db.set_field, 'users', self.id, doc)
+                    db.queue_set_field('users', self.id, doc)
                 else:
-                    await db.async_db_call(db.unset_field, 'users', self.id, doc)
+                    db.queue_unset_field('users', self.id, doc)
             case 'timeout':
-                await db.async_db_call(db.set_field, 'users', self.id, {'timeout': self.__timeout})
+                db.queue_set_field('users', self.id, {'timeout': self.__timeout})
             case 'skill_level':
-                await db.async_db_call(db.set_field, 'users', self.id, {'skill_level': self.skill_level.name})
+                db.queue_set_field('users', self.id, {'skill_level': self.skill_level.name})
             case 'req_skill_levels':
-                await db.async_db_call(db.set_field, 'users', self.id,
-                                       {'req_skill_levels': [level.name for level in self.req_skill_levels]})
+                db.queue_set_field('users', self.id,
+                                   {'req_skill_levels': [level.name for level in self.req_skill_levels]})
             case 'pref_factions':
-                await db.async_db_call(db.set_field, 'users', self.id, {'pref_factions': self.pref_factions})
+                db.queue_set_field('users', self.id, {'pref_factions': self.pref_factions})
             case 'hidden':
-                await db.async_db_call(db.set_field, 'users', self.id, {'hidden': self.__hidden})
+                db.queue_set_field('users', self.id, {'hidden': self.__hidden})
             case 'lobby_ping_pref':
-                await db.async_db_call(db.set_field, 'users', self.id, {'lobby_ping_pref': self.lobby_ping_pref})
+                db.queue_set_field('users', self.id, {'lobby_ping_pref': self.lobby_ping_pref})
             case 'lobby_ping_freq':
-                await db.async_db_call(db.set_field, 'users', self.id, {'lobby_ping_freq': self.lobby_ping_freq})
+                db.queue_set_field('users', self.id, {'lobby_ping_freq': self.lobby_ping_freq})
             case _:
                 raise KeyError(f"No field {arg} found")
 
@@ -550,8 +561,9 @@ class Player:
         new_names = ["N/A", "N/A", "N/A", "N/A"]
         new_ids = [0, 0, 0, 0]
 
+        chars_info = await census.get_chars_info(char_list)  # Resolve all chars in one Census request
         for char in char_list:
-            char_info = await census.get_char_info(char)
+            char_info = chars_info.get(char.lower())
             if not char_info:
                 if "NS" == char[-2:]:  # skip CharNotFound if char is NS
                     continue
@@ -13,7 +13,8 @@ from pytz import timezone
 import modules.config as cfg
 import modules.accounts_handler as accounts
 import modules.discord_obj as d_obj
-from modules import census, tools, loader, elo_ranks_handler
+import modules.database as db
+from modules import census, tools, loader, elo_ranks_handler, match_aggregates
 
 from classes import Player
 from classes.lobby import Lobby
@@ -72,6 +73,21 @@ class AdminCog(commands.Cog):
         else:
             await disp.UNEXPECTED_ERROR.send_priv(ctx)
 
+    @admin.command(name="stats_backfill")
+    async def stats_backfill(self, ctx: discord.ApplicationContext):
+        """Rebuild /stats duel aggregates from the full match history"""
+        await ctx.defer(ephemeral=True)
+        player_count, match_count = await match_aggregates.backfill()
+        await disp.STATS_BACKFILLED.send_priv(ctx, player_count, match_count)
+
+    @admin.command(name="db_stats")
+    async def db_stats(self, ctx: discord.ApplicationContext,
+                       log_export: discord.Option(bool, "Also write the stats to the log", default=False)):
+        """Database latency stats, per collection and operation"""
+        if log_export:
+            db.log_stats()
+        await disp.DB_STATS.send_priv(ctx, op_stats=db.op_stats(), executor=db.executor_stats())
+
     @admin.command(name="loader")
     async def loader(self, ctx: discord.ApplicationContext,
                      action: discord.Option(str, "Lock or Unlock FSBot", choices=("Unlock", "Lock"),
@@ -141,7 +157,7 @@ class AdminCog(commands.Cog):
     @census_group.command(name="censusonlinecheck")
     async def manual_census(self, ctx: discord.ApplicationContext):
         """Runs a REST census online check, to catch any login/logouts that the websocket may have missed"""
-        ran = await self.census_rest()
+        ran = await self.census_rest_check()
         await disp.MANUAL_CENSUS.send_priv(ctx, "successful." if ran else "failed.")
 
     @census_group.command(name='rest')
@@ -163,10 +179,34 @@ class AdminCog(commands.Cog):
                 self.census_rest.stop()
                 await disp.CENSUS_LOOP_CHANGED.send_priv(ctx, "Running", "stopped")
             case _:
-                await disp.CENSUS_LOOP_STATUS.send_priv(ctx, "Running" if self.census_rest.is_running() else "Stopped")
+                schedule = census.rest_schedule_stats()
+                await disp.CENSUS_LOOP_STATUS.send_priv(ctx, "Running" if self.census_rest.is_running() else "Stopped",
+                                                        "healthy" if schedule['websocket_healthy'] else "unhealthy",
+                                                        schedule['next_check'], schedule['failures'],
+                                                        schedule['trips'])
                 return
         await d_obj.d_log(f"{ctx.user.mention} {action}d the Census Loop.")
 
+    @census_group.command(name='cache')
+    async def census_cache(self, ctx: discord.ApplicationContext,
+                           action: discord.Option(str, "Show stats for, or clear the character lookup cache",
+                                                  choices=("Stats", "Clear"), default="Stats")):
+        """Census character lookup cache stats and invalidation"""
+        if action == "Clear":
+            census.invalidate_chars()
+            await d_obj.d_log(f"{ctx.user.mention} cleared the Census character cache.")
+            return await disp.CENSUS_CACHE_CLEARED.send_priv(ctx)
+        stats = census.char_cache_stats()
+        await disp.CENSUS_CACHE_STATS.send_priv(ctx, stats['hit_rate'], stats['hits'], stats['negative_hits'],
+                                                stats['misses'], stats['cached'], stats['not_found'])
+
+    @census_group.command(name='events')
+    async def census_events(self, ctx: discord.ApplicationContext):
+        """Census websocket login / logout event queue stats"""
+        stats = census.event_queue_stats()
+        await disp.CENSUS_EVENT_STATS.send_priv(ctx, stats['depth'], stats['max_depth'], stats['received'],
+                                                stats['coalesced'], stats['dropped'], stats['processed'])
+
     ##########################################################
 
     match_admin = discord.SlashCommandGroup(
@@ -758,13 +798,22 @@ class AdminCog(commands.Cog):
             self.wss_restart.start()
             log.info("Census REST and WSS Started..")
 
-    @tasks.loop(seconds=15)
+    @tasks.loop(seconds=census.REST_INTERVAL)
     async def census_rest(self):
-        """Backup census method for checking accounts online status"""
-        for _ in range(5):
+        """Backup census method for checking accounts online status, run when census schedules it.
+        Less often while the websocket is healthy, and backed off while the API is failing"""
+        if census.rest_check_due():
+            await self.census_rest_check()
+
+    async def census_rest_check(self):
+        """Run the REST online check, with a single try while the breaker is tripped"""
+        tries = 1 if census.rest_breaker_tripped() else 5
+        for _ in range(tries):
             if await census.online_status_rest(Player.map_chars_to_players()):
+                census.record_rest_check(True)
                 return True
-        log.warning("Could not reach REST api during census REST after 5 tries...")
+        log.warning(f"Could not reach REST api during census REST after {tries} tries...")
+        census.record_rest_check(False)
         return False
 
     @tasks.loop(hours=6)
@@ -776,7 +825,7 @@ class AdminCog(commands.Cog):
             except Exception as e:
                 log.error(f"Failed to close WSS: {e}")
             self.census_watchtower.cancel()
-        self.census_watchtower = self.bot.loop.create_task(census.online_status_updater(Player.map_chars_to_players))
+        self.census_watchtower = self.bot.loop.create_task(census.online_status_updater(Player.map_chars_to_players()))
 
     # @census_watchtower.after_loop
     # async def after_census_watchtower(self):
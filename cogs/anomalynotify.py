@@ -8,7 +8,10 @@ import asyncio
 import auraxium
 from auraxium import EventClient, Trigger
 import aiohttp
+from cachetools import TTLCache
 import datetime
+import heapq
+import json
 
 # Internal Imports
 from modules import discord_obj as d_obj, tools, database as db, config as cfg, tools
@@ -21,10 +24,12 @@ WORLD_DICT = {1: "Connery", 10: "Miller", 13: "Cobalt", 17: "Emerald", 40: "Solt
 ZONE_DICT = {2: "Indar", 4: "Hossin", 6: "Amerish", 8: "Esamir", 344: "Oshur"}
 AIRCRAFT_ID_DICT = {"Scythe": 7, "Reaver": 8, "Mosquito": 9, "Liberator": 10,
                     "Galaxy": 11, "Valkyrie": 14, "Dervish": 2136}
+AIRCRAFT_IDS = frozenset(AIRCRAFT_ID_DICT.values())
 ANOMALY_IDS_STR = ['228', '229', '230', '231', '232']
 ANOMALY_IDS = [228, 229, 230, 231, 232]
 STATE_DICT_INT = {135: 'Started', 138: 'Ended'}
 STATE_DICT_STR = {v: k for k, v in STATE_DICT_INT.items()}
+TOP_KILLERS = 10  # Characters on each anomaly's kills leaderboard
 
 
 class AnomalyEvent:
@@ -68,10 +73,14 @@ class AnomalyEvent:
         self.population: dict[str, int] = {}  # Population {faction_str: count}
         self.vehicle_data: dict[str, dict[str, int]] = {}  # Vehicle Data {faction_str: {vehicle_name: count}}
         self.kills_data: dict[int, int] = {}  # Per character aircraft kills {char_id: kills}
-        self.top_ten_data: dict[int, int] = {}  # Top ten players {char_id: Kills}
+        self.top_ten_data: dict[int, int] = {}  # Top ten players {char_id: Kills}, kept by add_kill
+        self._top_ten_heap: list[tuple[int, int]] = []  # Min-heap of top ten (Kills, char_id), with stale entries
         self.top_ten: dict[str, int] = {}  # Top ten players {FactionEmoji-CharName: Kills}
 
         self.message = None
+        self.version = 0  # Incremented on each change, so the message is only rendered when out of date
+        self.rendered_version = -1  # Version last rendered to the message
+        self.embed_hash: int | None = None  # Hash of the embed last rendered to the message
         self.unique_id = str(self)
         self.last_update_stamp = tools.timestamp_now()
 
@@ -111,6 +120,7 @@ class AnomalyEvent:
         if not self.is_active:
             self.end_stamp = evt.timestamp.replace(tzinfo=datetime.timezone.utc).timestamp()
 
+        self.version += 1
         self.last_update_stamp = tools.timestamp_now()
         log.debug(f'Updated {self} by evt')
         return self
@@ -127,10 +137,12 @@ class AnomalyEvent:
         if not self.is_active:
             self.end_stamp = int(data['timestamp'])
 
+        self.version += 1
         self.last_update_stamp = tools.timestamp_now()
 
         if data.get('kill_data'):
             self.kills_data = {int(char_id): int(count) for char_id, count in data['kill_data'].items()}
+            self._rebuild_top_ten()
 
         log.debug(f'Updated {self} by dict')
         return self
@@ -141,22 +153,50 @@ class AnomalyEvent:
             for faction in data[vehicle]:
                 if faction not in self.vehicle_data:
                     self.vehicle_data[faction] = {vehicle: data[vehicle][faction]}
-                else:
+                    self.version += 1
+                elif self.vehicle_data[faction].get(vehicle) != data[vehicle][faction]:
                     self.vehicle_data[faction][vehicle] = data[vehicle][faction]
+                    self.version += 1
 
         return self
 
     def update_population(self, data: dict):
         """Update the anomaly with faction specific population data from graphql"""
         for faction in data:
-            self.population[faction] = data[faction]
+            if self.population.get(faction) != data[faction]:
+                self.population[faction] = data[faction]
+                self.version += 1
 
     def add_kill(self, char_id):
-        """Track a characters Kill in an Anomaly"""
-        if char_id not in self.kills_data:
-            self.kills_data[char_id] = 1
+        """Track a characters Kill in an Anomaly, and keep the top ten up to date"""
+        kills = self.kills_data[char_id] = self.kills_data.get(char_id, 0) + 1
+        self.version += 1
+
+        # Kills only go up, so top ten characters just move up, and others join once they pass the lowest
+        if char_id in self.top_ten_data or len(self.top_ten_data) < TOP_KILLERS:
+            self.top_ten_data[char_id] = kills
+        elif kills > self._top_ten_lowest():
+            self.top_ten_data.pop(heapq.heappop(self._top_ten_heap)[1])
+            self.top_ten_data[char_id] = kills
         else:
-            self.kills_data[char_id] += 1
+            return
+        heapq.heappush(self._top_ten_heap, (kills, char_id))
+        if len(self._top_ten_heap) > 4 * TOP_KILLERS:
+            self._top_ten_heap = [(kills, char_id) for char_id, kills in self.top_ten_data.items()]
+            heapq.heapify(self._top_ten_heap)
+
+    def _top_ten_lowest(self) -> int:
+        """Kills of the lowest top ten character, dropping heap entries left by characters moving up"""
+        heap = self._top_ten_heap
+        while heap[0][0] != self.top_ten_data.get(heap[0][1]):
+            heapq.heappop(heap)
+        return heap[0][0]
+
+    def _rebuild_top_ten(self):
+        """Rebuild the top ten from all kills, when they're replaced"""
+        self.top_ten_data = dict(heapq.nlargest(TOP_KILLERS, self.kills_data.items(), key=lambda item: item[1]))
+        self._top_ten_heap = [(kills, char_id) for char_id, kills in self.top_ten_data.items()]
+        heapq.heapify(self._top_ten_heap)
 
     def get_fac_total_vehicles(self, faction: str):
         """Returns the total number of vehicles for a faction"""
@@ -229,9 +269,15 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
     def __init__(self, client):
         self.bot: discord.Bot = client
         self.events: dict[str, AnomalyEvent] = {}
+        self.zone_events: dict[tuple[int, int], AnomalyEvent] = {}  # (world_id, zone_id): event, routes kills
         self.notify_roles: dict[int, discord.Role] = {}
-        self.char_id_to_name: dict[int, str] = {}
+        # Display names {char_id: FactionEmoji-CharName}, fetched as characters enter a top ten
+        self.char_id_to_name: TTLCache = TTLCache(maxsize=cfg.anomaly['name_cache_size'],
+                                                  ttl=cfg.anomaly['name_cache_ttl'])
+        self.name_cache_stats = {"hits": 0, "misses": 0}
         self.update_lock: asyncio.Lock = asyncio.Lock()  # Lock for self.events, used when adding/removing events
+        self.render_tasks: dict[str, asyncio.Task] = {}  # Running message render task per anomaly unique_id
+        self.render_requested: set[str] = set()  # Anomalies asked to render again while their task was running
         self.last_graphql_update_stamp = 0  # Timestamp of last graphql update
         self.last_graphql_update_data = {}  # Cache of last graphql update
         self.top_ten_all_time_data: dict[str, int] = {}  # Most kills leaderboard (char_display-unique_id: kills)
@@ -239,6 +285,7 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
         self.notify_channel: discord.TextChannel | None = None
         self.view: views.FSBotView | None = None
         self.event_client = EventClient(loop=self.bot.loop, service_id=cfg.general['api_key'])
+        self.kill_client: EventClient | None = None  # VehicleDestroy websocket, only open while anomalies are active
 
         # Define triggers
         self.metagame_trigger = Trigger(event=auraxium.event.MetagameEvent,
@@ -247,13 +294,63 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
                                                                 evt.world_id in WORLD_DICT.keys()],
                                         action=self.anomaly_event_handler)
 
-        self.vehicle_destroy_trigger = Trigger(event=auraxium.event.VehicleDestroy, worlds=WORLD_DICT.keys(),
-                                               conditions=[lambda evt: evt.world_id in WORLD_DICT.keys()],
+        # Worlds set by update_kill_subscription
+        self.vehicle_destroy_trigger = Trigger(event=auraxium.event.VehicleDestroy, worlds=[],
                                                action=self.vehicle_destroy_event_handler)
 
         # Initialize roles, channel, view, and start listening to events through the event client and REST loop
         self.anomaly_initialize.start()
 
+    def _add_event(self, anom: AnomalyEvent) -> AnomalyEvent:
+        """Store an event, and index it by world and zone"""
+        self.events[anom.unique_id] = anom
+        key = (anom.world_id, anom.zone_id)
+        if (other := self.zone_events.get(key)) and other is not anom:
+            log.warning(f'Found more than one anomaly for world {key[0]} zone {key[1]}, routing kills to newest...')
+        self.zone_events[key] = anom
+        self.update_kill_subscription()
+        return anom
+
+    def _remove_event(self, unique_id: str) -> AnomalyEvent | None:
+        """Remove an event, and its world and zone index entry"""
+        if not (anom := self.events.pop(unique_id, None)):
+            return None
+        key = (anom.world_id, anom.zone_id)
+        if self.zone_events.get(key) is anom:
+            del self.zone_events[key]
+            # Fall back to any other event left on the same zone
+            for other in self.events.values():
+                if (other.world_id, other.zone_id) == key:
+                    self.zone_events[key] = other
+                    break
+        self.update_kill_subscription()
+        return anom
+
+    def update_kill_subscription(self):
+        """Subscribe to VehicleDestroy events only on worlds with an active anomaly, closing the websocket when
+        there are none.  Kills have their own websocket as the ESS applies one world list to every event subscribed
+        on a connection."""
+        worlds = sorted({anom.world_id for anom in self.events.values()})
+        if not worlds:
+            if self.kill_client:
+                log.info('No active anomalies, closing VehicleDestroy websocket...')
+                self.bot.loop.create_task(self.kill_client.close())
+                self.kill_client = None
+            return
+        if self.kill_client and worlds == self.vehicle_destroy_trigger.worlds:
+            return
+        self.vehicle_destroy_trigger.worlds = worlds
+        if not self.kill_client:
+            log.info(f'Opening VehicleDestroy websocket for worlds {worlds}...')
+            self.kill_client = EventClient(loop=self.bot.loop, service_id=cfg.general['api_key'])
+            self.kill_client.add_trigger(self.vehicle_destroy_trigger)
+            return
+        # Subscriptions are additive, so clear before resubscribing to drop worlds no longer active
+        log.info(f'Resubscribing VehicleDestroy websocket for worlds {worlds}...')
+        clear = {"service": "event", "action": "clearSubscribe", "all": "true"}
+        self.kill_client._send_queue.append(json.dumps(clear))
+        self.kill_client._subscribe_all()
+
     @property
     def all_events_list(self):
         return list(self.events.values())
@@ -283,7 +380,7 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
         except KeyError:
             old_events = []
         for event in old_events:
-            anom = self.events[event['unique_id']] = AnomalyEvent.from_dict(event)
+            anom = self._add_event(AnomalyEvent.from_dict(event))
             try:
                 anom.message = await self.notify_channel.fetch_message(event['message_id'])
             except discord.NotFound:
@@ -313,12 +410,9 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
         # Add view to bot
         self.bot.add_view(self.view)
 
-        # Start listening to anomaly events
+        # Start listening to anomaly events.  VehicleDestroy events are tracked by update_kill_subscription
         self.event_client.add_trigger(self.metagame_trigger)
 
-        # Start tracking VehicleDestroy events
-        self.event_client.add_trigger(self.vehicle_destroy_trigger)
-
         # Wait until the eventclient is ready
         await self.event_client.wait_ready()
 
@@ -343,7 +437,13 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
                 pass
             self.event_client = EventClient(loop=self.bot.loop, service_id=cfg.general['api_key'])
             self.event_client.add_trigger(self.metagame_trigger)
-            self.event_client.add_trigger(self.vehicle_destroy_trigger)
+
+        if self.kill_client and (force or not self.kill_client.websocket or self.kill_client.websocket.closed):
+            log.warning('VehicleDestroy websocket closed, restarting...')
+            self.kill_client.remove_trigger(self.vehicle_destroy_trigger, keep_websocket_alive=True)
+            await self.kill_client.close()
+            self.kill_client = None
+            self.update_kill_subscription()
 
     @staticmethod
     def anomaly_check(event: auraxium.event.MetagameEvent):
@@ -355,12 +455,18 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
         log.debug(f'Updating anomaly {anom.unique_id} message')
         self.update_from_graphql_data([anom])
         await self.build_top_ten_kills_list([anom])
-
-        if anom.message:
-            anom.message = await disp.ANOMALY_EVENT.edit(anom.message, ping_str, anomaly=anom)
+        anom.rendered_version = anom.version  # Changes from here on are picked up by the next render
+
+        embed = embeds.anomaly_event(anomaly=anom)
+        embed_hash = tools.embed_hash(embed)
+        if anom.message and embed_hash == anom.embed_hash:
+            log.debug(f'Anomaly {anom.unique_id} message unchanged, skipping edit')
+        elif anom.message:
+            anom.message = await disp.ANOMALY_EVENT.edit(anom.message, ping_str, embed=embed)
         else:
             anom.message = await disp.ANOMALY_EVENT.send(d_obj.channels['anomaly_notify'],
-                                                         '' if not anom.is_active else ping_str, anomaly=anom)
+                                                         '' if not anom.is_active else ping_str, embed=embed)
+        anom.embed_hash = embed_hash
 
         # Here to ensure it's after building top ten kills list
         if not anom.is_active:
@@ -368,9 +474,28 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
 
         return anom.message
 
+    async def _render_event_embed(self, anom: AnomalyEvent):
+        """
+        Render the message once, and once more if asked to while rendering, so each call renders at most once.
+        Kills alone don't trigger renders, they're shown on the next call from the update loop or an event.
+        """
+        try:
+            await self._update_event_embed(anom)
+            while anom.unique_id in self.render_requested and anom.rendered_version != anom.version:
+                self.render_requested.discard(anom.unique_id)
+                await self._update_event_embed(anom)
+        finally:
+            self.render_tasks.pop(anom.unique_id, None)
+            self.render_requested.discard(anom.unique_id)
+
     def update_event_embed(self, anom: AnomalyEvent):
-        """Uses task to update message"""
-        asyncio.create_task(self._update_event_embed(anom))
+        """Uses a single task per anomaly to update its message, if it changed since last rendered"""
+        if anom.message and anom.rendered_version == anom.version:
+            return
+        if anom.unique_id in self.render_tasks:
+            self.render_requested.add(anom.unique_id)
+            return
+        self.render_tasks[anom.unique_id] = asyncio.create_task(self._render_event_embed(anom))
 
     async def update_all_from_rest(self):
         """
@@ -404,7 +529,7 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
                                 log.debug(f'Removing inactive anomaly {anom.unique_id}')
                                 ended.append(anom.unique_id)
                                 if unique_id in self.events:
-                                    removed.append(self.events.pop(anom.unique_id))
+                                    removed.append(self._remove_event(anom.unique_id))
 
                 elif event['metagame_event_state_name'] == 'ended':
                     # if event is not stored and is ended, add it to ended list to check against started events
@@ -418,7 +543,7 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
                     async with self.update_lock:
                         if unique_id not in self.events:  # re-check after acquiring lock
                             # if event is not stored and is active, store it
-                            self.events[unique_id] = AnomalyEvent.from_dict(event)
+                            self._add_event(AnomalyEvent.from_dict(event))
                             log.debug(f'Adding new anomaly from REST {unique_id}')
         return removed
 
@@ -474,54 +599,35 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
                 anom.update_from_evt(evt)
 
                 if not anom.is_active:
-                    if unique_id in self.events:
-                        self.events.pop(unique_id)
+                    self._remove_event(unique_id)
                 self.update_event_embed(anom)
 
             elif evt.metagame_event_state_name == 'started':
-                self.events[unique_id] = AnomalyEvent.from_evt(evt)
-                self.update_event_embed(self.events[unique_id])
+                self.update_event_embed(self._add_event(AnomalyEvent.from_evt(evt)))
 
     def vehicle_destroy_event_handler(self, evt: auraxium.event):
         """Validate vehicle destroy events are relevant, and then update an anomaly with a vehicle destroy event"""
 
         # Check if vehicledestroy is on relevant world and zone
-        relevant_anom = [anom for anom in self.events.values() if anom.world_id == evt.world_id
-                         and anom.zone_id == evt.zone_id]
-        if not relevant_anom:
-            return
-
-        elif len(relevant_anom) > 1:
-            log.warning(f'Found more than one relevant anomaly for vehicle destroy event... ignoring event...')
+        if not (anom := self.zone_events.get((evt.world_id, evt.zone_id))):
             return
 
         # Check if VehicleDestroy is not aircraft on aircraft
-        if evt.attacker_vehicle_id not in AIRCRAFT_ID_DICT.values() or evt.vehicle_id not in AIRCRAFT_ID_DICT.values():
+        if evt.attacker_vehicle_id not in AIRCRAFT_IDS or evt.vehicle_id not in AIRCRAFT_IDS:
             return
 
         # Check if VehicleDestroy is a teamkill
         if evt.attacker_team_id == evt.faction_id:
             return
 
-        relevant_anom[0].add_kill(evt.attacker_character_id)
-        log.debug(f'Added kill to anomaly {relevant_anom[0].unique_id} for {evt.attacker_character_id}')
+        anom.add_kill(evt.attacker_character_id)
+        log.debug(f'Added kill to anomaly {anom.unique_id} for {evt.attacker_character_id}')
 
     async def build_top_ten_kills_list(self, events: list = None):
         """Get player character names and factions for a top ten killers list"""
 
-        character_ids_to_fetch = []
-        # Find the 10 players with the most kills in kills_data for each event
-        for event in events:
-            log.debug(f'Checking top ten for {event.unique_id}, pulling from {len(event.kills_data)} characters')
-            for char_id, kills in event.kills_data.items():
-                if len(event.top_ten_data) < 10 or kills > min(event.top_ten_data.values()):
-                    log.debug(f'Adding {char_id} to top ten for {event.unique_id}')
-                    event.top_ten_data[char_id] = kills
-                    if len(event.top_ten_data) > 10:
-                        event.top_ten_data.pop(min(event.top_ten_data, key=event.top_ten_data.get))
-
-            # Add the top ten to the list of character ids to fetch from the API
-            character_ids_to_fetch.extend([str(char_id) for char_id in event.top_ten_data.keys()])
+        # Add the top ten of each event, kept by add_kill, to the list of character ids to fetch from the API
+        character_ids_to_fetch = list(dict.fromkeys(str(char_id) for event in events for char_id in event.top_ten_data))
 
         # Fetch the character data from the API if required
         if not await self.populate_char_name_cache(character_ids_to_fetch):
@@ -534,17 +640,13 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
                              sorted(event.top_ten_data.items(), key=lambda item: item[1], reverse=True)}
             log.debug(f"Top ten for {event.unique_id}: {event.top_ten}")
 
-        # Update the character name cache to include only characters in active events
-        self.char_id_to_name = {char_id: name for char_id, name
-                                in self.char_id_to_name.items() if char_id in
-                                [char_id for event in self.all_events_list for char_id in event.kills_data.keys()]}
-        log.debug(f'Updated character name cache to include {len(self.char_id_to_name)} characters')
-        # list comprehension for all char_ids from all events kills data
-
     async def populate_char_name_cache(self, char_ids: list[str] = None):
         """Populate the char_id_to_name cache with character names from the API"""
         # Check which character names are not already cached
-        char_ids = [char_id for char_id in char_ids if int(char_id) not in self.char_id_to_name.keys()]
+        requested = len(char_ids)
+        char_ids = [char_id for char_id in char_ids if int(char_id) not in self.char_id_to_name]
+        self.name_cache_stats["hits"] += requested - len(char_ids)
+        self.name_cache_stats["misses"] += len(char_ids)
         if not char_ids:
             log.debug('Requested character ids are already cached')
             return True
@@ -667,6 +769,14 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
         await self.anomaly_update_loop()
         await disp.ANOMALY_MANUAL_LOOP.send_priv(ctx, delete_after=5)
 
+    @anomaly_commands.command(name="name_cache")
+    async def anomalynamecache(self, ctx: discord.ApplicationContext):
+        """Character name cache stats"""
+        lookups = self.name_cache_stats['hits'] + self.name_cache_stats['misses']
+        await disp.ANOMALY_NAME_CACHE.send_priv(ctx, self.name_cache_stats['hits'] / lookups if lookups else 0,
+                                                self.name_cache_stats['hits'], self.name_cache_stats['misses'],
+                                                len(self.char_id_to_name), self.char_id_to_name.maxsize)
+
     @anomaly_commands.command(name="restartwss")
     async def anomalyrestartwss(self, ctx: discord.ApplicationContext):
         """Restart websocket"""
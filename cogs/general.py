@@ -14,7 +14,7 @@ from modules.spam_detector import is_spam
 from display import AllStrings as disp, views
 from classes import Player, PlayerStats
 from classes.match import EndCondition
-from modules import database as db
+from modules import database as db, match_aggregates
 
 import modules.config as cfg
 
@@ -102,66 +102,24 @@ class GeneralCog(commands.Cog, name="GeneralCog"):
 
         await ctx.defer(ephemeral=True)
 
-        # This could become rather expensive over time...
-        get_player_matches = await db.async_db_call(db.find_elements,
-                                                    "matches",
-                                                    {
-                                                        "$or": [
-                                                            {"current_players": player.id},
-                                                            {"previous_players": player.id}
-                                                        ]
-                                                    }
-                                                    )
-        player_matches = list(get_player_matches)
-        player_match_count = len(player_matches)
-
-        if player_match_count == 0:
-            return await disp.STAT_NO_MATCHES.send_priv(ctx, user.mention)
-
-        # Sum match time and count times partners appear across all matches
-        total_duel_sec = 0
-        partners = {}
-
-        for match in player_matches:
-            total_duel_sec += match["end_stamp"] - match["start_stamp"]
-
-            for player_id in match["current_players"]:
-                if player_id == player.id:
-                    continue
-                if player_id in partners:
-                    partners[player_id] += 1
-                else:
-                    partners[player_id] = 1
-
-            for player_id in match["previous_players"]:
-                if player_id == player.id:
-                    continue
-                if player_id in partners:
-                    partners[player_id] += 1
-                else:
-                    partners[player_id] = 1
-
-        #  Count up top 3 duel partners
-        highest_partner = None
-        duel_partners = ""
+        # Aggregates are maintained as matches end and backfilled on startup, see modules.match_aggregates
+        # Fall back to computing them server side if they aren't backfilled or the player has none
+        aggregates = None
+        if match_aggregates.is_backfilled():
+            aggregates = await match_aggregates.get_player_aggregates(player.id)
+        aggregates = aggregates or await match_aggregates.query_player_stats(player.id)
 
-        for i in range(3):
-            if len(partners) == 0:
-                break
-
-            # Find the partner with which we've had the most matches
-            for partner_id, match_count in partners.items():
-                if highest_partner is None or highest_partner[1] < match_count:
-                    highest_partner = (partner_id, match_count)
+        if not aggregates or aggregates['total_matches'] == 0:
+            return await disp.STAT_NO_MATCHES.send_priv(ctx, user.mention)
 
-            # Check if we selected a new highest partner
-            if highest_partner is None or highest_partner[0] not in partners:
-                continue
+        player_match_count = aggregates['total_matches']
+        total_duel_sec = aggregates['total_duel_sec']
 
-            # We've found a new highest partner. Add them and move on
-            duel_partners += disp.STAT_PARTNER_MATCH_COUNT.value.format(highest_partner[0], highest_partner[1])
+        #  Top 3 duel partners
+        duel_partners = ""
+        for partner_id, match_count in match_aggregates.top_partners(aggregates, 3):
+            duel_partners += disp.STAT_PARTNER_MATCH_COUNT.value.format(partner_id, match_count)
             duel_partners += "\n"
-            partners.pop(highest_partner[0])
 
         return await disp.STAT_RESPONSE.send_priv(
             ctx,
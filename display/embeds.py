@@ -252,6 +252,28 @@ def stat_response(player: Player, match_count: int, total_duel_sec: int, duel_pa
     return embed
 
 
+def db_stats(op_stats: list[dict], executor: dict) -> Embed:
+    """Database latency stats, from modules.database.op_stats and executor_stats"""
+    embed = Embed(
+        colour=Colour.blurple(),
+        title="Database Stats",
+        description=f"Executor: {executor['workers']} workers, {executor['queued']} queued, "
+                    f"{executor['running']} running, {executor['timeouts']} timeouts\n"
+                    f"Queue wait: avg {executor['avg_wait'] * 1000:.1f}ms, max {executor['max_wait'] * 1000:.1f}ms",
+        timestamp=dt.now()
+    )
+
+    rows = [f"{'collection.operation':<32}{'calls':>7}{'err':>5}{'avg':>8}{'p95':>8}{'max':>8}"]
+    for stats in op_stats[:12]:  # Sorted by total time, 12 rows keeps within the field length limit
+        rows.append(f"{(stats['collection'] + '.' + stats['operation'])[:31]:<32}{stats['count']:>7}"
+                    f"{stats['errors']:>5}{stats['avg'] * 1000:>8.1f}{stats['p95'] * 1000:>8.1f}"
+                    f"{stats['max'] * 1000:>8.1f}")
+    embed.add_field(name="Operations, times in ms",
+                    value="```\n" + "\n".join(rows) + "\n```" if op_stats else "No calls recorded yet",
+                    inline=False)
+    return embed
+
+
 def player_info(player) -> Embed:
     embed = Embed(
         colour=Colour.greyple(),
@@ -49,6 +49,8 @@ class AllStrings(Enum):
     CONTENT_ONLY = 'Oops {}, messages in this channel must contain either an attachment or a link!'
 
     LEADERBOARD_UPDATED = "Leaderboard in {} was updated!"
+    STATS_BACKFILLED = "Rebuilt duel stats for **{}** players from **{}** matches."
+    DB_STATS = None, db_stats
 
     ADMIN_MATCH_CREATE_ALREADY = "One of the players used is already in a match!"
     ADMIN_MATCH_CREATE_SAME = "Both players are the same! Please pass different players!"
@@ -66,8 +68,13 @@ class AllStrings(Enum):
     LOADER_TOGGLE = "FSBot {}ed"
     HELLO = "Hello there {}"
     MANUAL_CENSUS = "Manual Census Check {}"
-    CENSUS_LOOP_STATUS = "The Census loop is {}"
+    CENSUS_LOOP_STATUS = "The Census loop is {}.  Websocket {}, next online check in {}s, " \
+                         "{} consecutive failed checks, breaker tripped {} times."
     CENSUS_LOOP_CHANGED = "The Census loop was {}, it has now been {}."
+    CENSUS_CACHE_STATS = "Census character cache: **{:.0%}** hit rate, {} hits, {} not found hits, {} misses.  " \
+                         "{} characters cached, {} cached as not found."
+    CENSUS_CACHE_CLEARED = "Census character cache cleared."
+    CENSUS_EVENT_STATS = "Census event queue: {} queued (max {}), {} received, {} coalesced, {} dropped, {} processed."
     SUGGESTION_ACCEPTED = "{} your suggestion has been submitted to the administration team. Thanks!"
 
     LOG_ACCOUNT = "Account [{}] sent to player: ID: [{}], mention: [{}], name: [{}]"
@@ -280,6 +287,7 @@ class AllStrings(Enum):
     ANOMALY_EVENT = "{}", anomaly_event
     ANOMALY_MANUAL_LOOP = "Manually looping anomaly event updater!"
     ANOMALY_WSS_RESTART = "Restarting WSS for anomaly event updater!"
+    ANOMALY_NAME_CACHE = "Anomaly name cache: **{:.0%}** hit rate, {} hits, {} misses.  {} of {} names cached."
     ANOMALY_REMOVE_LEADERBOARD = "Removed {} from the anomaly leaderboard!"
     ANOMALY_REMOVE_LEADERBOARD_NOT_FOUND = "Could not find {} in the anomaly leaderboard!"
 
@@ -16,6 +16,7 @@ import asyncio
 import argparse
 import pathlib
 import os
+import time
 
 # internal imports
 import modules.config as cfg
@@ -25,6 +26,7 @@ import modules.database
 import modules.loader as loader
 import modules.signal
 import modules.elo_ranks_handler as elo_ranks
+import modules.match_aggregates as match_aggregates
 import classes
 import display
 import modules.spam_detector as spam
@@ -130,9 +132,15 @@ async def on_ready():
     modules.signal.init(bot)
     d_obj.init(bot)
     bot.loop.create_task(modules.accounts_handler.init(cfg.GAPI_SERVICE, cfg.TEST), name="Accounts Handler Init")
+    bot.loop.create_task(modules.database.write_behind_loop(), name="Database Write Behind")
+    bot.loop.create_task(modules.database.stats_log_loop(), name="Database Stats Log")
     # loader.load_secondary(bot)
     await loader.load_all(bot)
     bot.loop.create_task(elo_ranks.init_elo_ranks(), name="Elo Ranks Init")
+    try:  # Before unlocking, so no match ends during a backfill
+        await match_aggregates.init()
+    except Exception as e:  # /stats falls back to the matches collection, the backfill is retried next start
+        log.error("Match aggregates backfill failed", exc_info=e)
     loader.unlock_all()
     loader.set_all_loaded()
 
@@ -219,8 +227,12 @@ async def on_member_update(before: discord.Member, after: discord.Member):
 
 # database init
 modules.database.init(cfg.database)
-modules.database.get_all_elements(classes.Player.new_from_data, 'users')
-log.info("Loaded Players from Database: %s", len(classes.Player.get_all_players()))
+load_start = time.perf_counter()
+players_loaded = modules.database.get_all_elements(classes.Player.new_from_data, 'users',
+                                                   projection=classes.Player.DB_PROJECTION)
+load_time = time.perf_counter() - load_start
+log.info("Loaded Players from Database: %s in %.2fs (%.0f players/s)", players_loaded, load_time,
+         players_loaded / load_time if load_time else 0)
 
 loader.init(bot)
 bot.run(cfg.general['token'])
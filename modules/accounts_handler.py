@@ -135,6 +135,7 @@ async def init(service_account_path: str, test=False):
         del all_accounts[acc_id]
 
     await unassigned_online(None)  # Run check to ensure no accounts are online on startup.
+    census.schedule_subscription_update()  # Account characters may have changed
     global INITIALISED
     if not INITIALISED or not INITIALISED.done():
         INITIALISED.set_result(True)
@@ -5,7 +5,11 @@ Census module for tracking Jaeger players.  Currently used to ensure FS block ac
 
 # External Imports
 import auraxium
+import aiohttp
 import asyncio
+import json
+import time
+from cachetools import TTLCache
 from logging import getLogger
 
 # Internal Imports
@@ -16,8 +20,128 @@ log = getLogger('fs_bot')
 
 WORLD_ID = 19
 EVENT_CLIENT: None | auraxium.EventClient = None
+WEBSOCKET_STALE_AFTER = 90  # Seconds without a payload before the websocket is unhealthy, heartbeats come every 30s
+
+# Login / logout triggers on EVENT_CLIENT, subscribed only for tracked characters
+_tracked_triggers: list['CharacterTrigger'] = []
+_tracked_players_map: dict = dict()  # Live char_id: Player index, from online_status_updater
+_subscription_task: asyncio.Task | None = None
+SUBSCRIPTION_UPDATE_DELAY = 5  # Seconds to batch registration / account changes into one resubscribe
+
+
+class CharacterTrigger(auraxium.Trigger):
+    """Trigger whose subscription only covers its characters within its worlds.
+    Census ORs characters with worlds unless told otherwise, which would subscribe to the whole world.
+    Overriding here also covers auraxium's own resubscribes after a reconnect."""
+
+    def generate_subscription(self, logical_and: bool | None = None) -> str:
+        if logical_and is None and self.characters:
+            logical_and = True
+        return super().generate_subscription(logical_and)
+
+
+class TrackedEventClient(auraxium.event.EventClient):
+    """EventClient recording when it last received a payload, heartbeats included, so a connection that is open
+    but no longer receiving anything can be told apart from a healthy one"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_payload = 0.0
+
+    def _process_payload(self, response: str) -> None:
+        self.last_payload = time.monotonic()
+        super()._process_payload(response)
+
+
+def websocket_healthy() -> bool:
+    """Whether EVENT_CLIENT is connected and has received a payload recently"""
+    return bool(EVENT_CLIENT and EVENT_CLIENT.websocket and EVENT_CLIENT.websocket.open
+                and time.monotonic() - EVENT_CLIENT.last_payload < WEBSOCKET_STALE_AFTER)
+
+
+# Websocket login / logout events waiting for _event_consumer, char_id: online.  Coalesced per character,
+# so a burst of events for one character is processed once with its latest state
+_pending_events: dict[int, bool] = dict()
+_event_ready = asyncio.Event()
+_consumer_task: asyncio.Task | None = None
+_event_stats = {"received": 0, "coalesced": 0, "dropped": 0, "processed": 0, "max_depth": 0}
+EVENT_QUEUE_SIZE = 2000  # Max characters queued, well over the tracked characters logging in at a server restart
+
+_rest_stats = {"polls": 0, "logins": 0, "logouts": 0, "failed_chunks": 0}
+REST_CHUNK_SIZE = 150  # Character ids per REST online status query, keeps the URL well under server limits
+
+# REST online check scheduling.  The check only reconciles missed websocket events while the websocket is healthy,
+# and after consecutive failures the breaker trips, backing off exponentially until a check succeeds again.
+REST_INTERVAL = 15  # Seconds between checks while the websocket is unhealthy
+REST_HEALTHY_INTERVAL = 180  # Seconds between checks while the websocket is healthy
+REST_BREAKER_THRESHOLD = 3  # Consecutive failed checks to trip the breaker
+REST_BACKOFF_MAX = 600  # Max seconds between checks while the breaker is tripped
+_rest_schedule = {"next_check": 0.0, "failures": 0, "trips": 0, "skipped": 0, "websocket_healthy": False}
+
+# Shared REST client, with a keep-alive connection pool.  Created on first use by get_client()
+_client: None | auraxium.Client = None
+CONNECTION_LIMIT = 10  # Max concurrent connections to the Census API
+# Seconds an idle connection is kept open, longer than the REST check interval while the websocket is healthy
+# so steady state checks reuse it.  Backed off checks while the breaker is tripped reconnect
+KEEPALIVE_TIMEOUT = REST_HEALTHY_INTERVAL + 30
+
+
+async def get_client() -> auraxium.Client:
+    """Get the shared Census REST client, creating it if it doesn't exist or has been closed.
+    Connections are kept alive between requests, so polling doesn't repeat the TLS handshake every call."""
+    global _client
+    if _client is None or _client.session.closed:
+        client = auraxium.Client(service_id=cfg.general['api_key'])
+        default_session = client.session
+        client.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=CONNECTION_LIMIT, keepalive_timeout=KEEPALIVE_TIMEOUT))
+        _client = client
+        await default_session.close()  # Unused session auraxium creates by default
+    return _client
+
+
+async def close():
+    """Close the shared REST client's connections"""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.close()
+
+
+# Character lookup cache, by lowercase name: [name, id, faction, world].  Least recently used names are evicted when full.
+# Names not found are cached separately for a shorter time, as they may be created at any point.
+CHAR_CACHE_SIZE = 2000
+CHAR_CACHE_TTL = 24 * 60 * 60
+CHAR_NOT_FOUND_TTL = 5 * 60
+_char_cache = TTLCache(maxsize=CHAR_CACHE_SIZE, ttl=CHAR_CACHE_TTL)
+_char_not_found = TTLCache(maxsize=CHAR_CACHE_SIZE, ttl=CHAR_NOT_FOUND_TTL)
+_char_cache_stats = {"hits": 0, "negative_hits": 0, "misses": 0}
+
+
+def invalidate_chars(char_names: list[str] | None = None):
+    """
+    Remove characters from the lookup cache, so they are fetched from Census again on next lookup.
+
+    :param char_names: names to remove, the whole cache is cleared if None
+    """
+    if char_names is None:
+        _char_cache.clear()
+        _char_not_found.clear()
+        return
+    for name in char_names:
+        _char_cache.pop(name.lower(), None)
+        _char_not_found.pop(name.lower(), None)
 
 
+def char_cache_stats() -> dict:
+    """
+    :return: dict of hits, negative_hits, misses, hit_rate, and current cached / not found entries
+    """
+    lookups = sum(_char_cache_stats.values())
+    hits = _char_cache_stats["hits"] + _char_cache_stats["negative_hits"]
+    return {**_char_cache_stats, "hit_rate": hits / lookups if lookups else 0.,
+            "cached": len(_char_cache), "not_found": len(_char_not_found)}
+
 
 def get_account_chars_list(account_dict: dict):
     """Builds a list of IGN's from the currently available Jaeger accounts"""
@@ -32,50 +156,97 @@ def get_account_chars_list(account_dict: dict):
 async def get_chars_list_online_status(chars_list: list):
     """Gets online status from list of IGN's, returns as dictionary of account_id: online_char"""
     names_string = ','.join(chars_list)
-    async with auraxium.Client(service_id=cfg.general['api_key']) as client:
-        # build query
-        query = auraxium.census.Query('character', service_id=cfg.general['api_key'])
-        query.add_term('name.first_lower', names_string.lower())
-        join = query.create_join('characters_online_status')
-        query.show('character_id', 'name.first')
-        query.limit(100)
-        try:
-            data = await client.request(query)
-        except auraxium.errors.ServiceUnavailableError:
-            log.error('API unreachable during online check')
-            return False
-        if data["returned"] == 0:
-            log.error('API unreachable during online check')
-            return False
-
-        # pull data from dict response
-        online_names = list()
-        for a_return in data['character_list']:
-            if a_return['character_id_join_characters_online_status']['online_status'] != "0":
-                online_names.append(a_return['name']['first'])
-        # assemble dict return
-        online_dict = dict()
-        for name in online_names:
-            a_id = int(name[-4:-2])
-            online_dict[a_id] = [name, accounts.all_accounts[a_id].unique_usages[-1]]
-        # if no online accounts return False
-        if len(online_dict.keys()) == 0:
-            return False
+    client = await get_client()
+    # build query
+    query = auraxium.census.Query('character', service_id=cfg.general['api_key'])
+    query.add_term('name.first_lower', names_string.lower())
+    join = query.create_join('characters_online_status')
+    query.show('character_id', 'name.first')
+    query.limit(100)
+    try:
+        data = await client.request(query)
+    except auraxium.errors.ServiceUnavailableError:
+        log.error('API unreachable during online check')
+        return False
+    if data["returned"] == 0:
+        log.error('API unreachable during online check')
+        return False
+
+    # pull data from dict response
+    online_names = list()
+    for a_return in data['character_list']:
+        if a_return['character_id_join_characters_online_status']['online_status'] != "0":
+            online_names.append(a_return['name']['first'])
+    # assemble dict return
+    online_dict = dict()
+    for name in online_names:
+        a_id = int(name[-4:-2])
+        online_dict[a_id] = [name, accounts.all_accounts[a_id].unique_usages[-1]]
+    # if no online accounts return False
+    if len(online_dict.keys()) == 0:
+        return False
     return online_dict
 
 
+async def get_chars_info(char_names: list[str]) -> dict[str, list[str, int, int, int | None]]:
+    """
+    Resolve characters from the lookup cache, fetching any not cached in a single Census query.
+
+    :param char_names: character names to be searched
+    :return: dict of lowercase name: [Character name, ID, faction and world].  Only chars that exist are included,
+     world is None if Census has no world for the character.
+    """
+    chars_info = dict()
+    to_fetch = []
+    for name in char_names:
+        key = name.lower()
+        if key in _char_cache:
+            _char_cache_stats["hits"] += 1
+            chars_info[key] = list(_char_cache[key])
+        elif key in _char_not_found:
+            _char_cache_stats["negative_hits"] += 1
+        else:
+            _char_cache_stats["misses"] += 1
+            to_fetch.append(name)
+
+    if to_fetch:
+        fetched = await _fetch_chars_info(to_fetch)
+        for name in to_fetch:
+            key = name.lower()
+            if key in fetched:
+                _char_cache[key] = fetched[key]
+                chars_info[key] = list(fetched[key])
+            else:
+                _char_not_found[key] = True
+    return chars_info
+
+
+async def _fetch_chars_info(char_names: list[str]) -> dict[str, list[str, int, int, int | None]]:
+    """Resolve several characters in a single character query, joined to characters_world"""
+    client = await get_client()
+    query = auraxium.census.Query('character', service_id=cfg.general['api_key'])
+    query.add_term('name.first_lower', ','.join(char_names).lower())
+    query.show('character_id', 'name.first', 'faction_id')
+    query.create_join('characters_world').set_inject_at('world').show('world_id')
+    query.limit(len(char_names))
+    data = await client.request(query)
+
+    chars_info = dict()
+    for a_return in data.get('character_list', []):
+        world = a_return.get('world', {}).get('world_id')
+        chars_info[a_return['name']['first'].lower()] = [a_return['name']['first'], int(a_return['character_id']),
+                                                         int(a_return['faction_id']),
+                                                         int(world) if world is not None else None]
+    return chars_info
+
+
 async def get_char_info(char_name) -> list[str, int, int, int] | None:
     """
 
     :param char_name: character name to be searched
-    :return: [Character name, ID, faction and world].  Empty list if no character found
+    :return: [Character name, ID, faction and world].  None if no character found
     """
-    async with auraxium.Client(service_id=cfg.general['api_key']) as client:
-        char = await client.get_by_name(auraxium.ps2.Character, char_name)
-        if not char:
-            return None
-        char_world = await char.world()
-        return [char.name.first, char.id, char.faction_id, char_world.id]
+    return (await get_chars_info([char_name])).get(char_name.lower())
 
 
 async def get_ids_facs_from_chars(chars_list) -> dict[str, tuple[int, int]] | bool:
@@ -84,27 +255,17 @@ async def get_ids_facs_from_chars(chars_list) -> dict[str, tuple[int, int]] | bo
     :param chars_list, list of characters to return ids for
     :return: dict of str(char_name): int(id).  returns only chars that exist
     """
-    names_string = ','.join(chars_list)
-    async with auraxium.Client(service_id=cfg.general['api_key']) as client:
-        # build query
-        query = auraxium.census.Query('character', service_id=cfg.general['api_key'])
-        query.add_term('name.first_lower', names_string.lower())
-        query.show('character_id', 'name.first', 'faction_id')
-        query.limit(100)
-        try:
-            data = await client.request(query)
-        except auraxium.errors.ServiceUnavailableError:
-            log.error('API unreachable during online check')
-            return False
-
-        char_dict = dict()
-        for a_return in data['character_list']:
-            char_name = a_return['name']['first']
-            char_id = int(a_return['character_id'])
-            char_fac_id = int(a_return['faction_id'])
-            char_dict[char_name] = (char_id, char_fac_id)
-
-        return char_dict
+    try:
+        chars_info = await get_chars_info(chars_list)
+    except auraxium.errors.ServiceUnavailableError:
+        log.error('API unreachable during online check')
+        return False
+
+    char_dict = dict()
+    for char_name, char_id, char_fac_id, _ in chars_info.values():
+        char_dict[char_name] = (char_id, char_fac_id)
+
+    return char_dict
 
 
 async def login(char_id, acc_char_ids, player_char_ids):
@@ -165,35 +326,197 @@ async def logout(char_id, acc_char_ids, player_char_ids):
         return
 
 
-async def online_status_updater(chars_players_map_func):
-    """Responsible for updating player and account objects with their currently
-    online characters"""
-    acc_char_ids = accounts.account_char_ids
+def _is_online(char_id, acc_char_ids, player_char_ids) -> bool:
+    """Whether a tracked character is already online on its account / player"""
+    owner = acc_char_ids.get(char_id) or player_char_ids.get(char_id)
+    return owner is not None and owner.online_id == char_id
+
+
+def _tracked_char_ids() -> list[int]:
+    """All character ids the bot tracks, Jaeger account chars and registered player chars"""
+    return list(accounts.account_char_ids.keys()) + list(_tracked_players_map.keys())
+
+
+def update_subscriptions():
+    """Restrict the login / logout triggers to the currently tracked characters.
+    If they changed, clear the websocket's subscriptions and resubscribe all triggers."""
+    if not EVENT_CLIENT or not _tracked_triggers:
+        return
+    char_ids = sorted(set(_tracked_char_ids()))
+    if all(trigger.characters == char_ids for trigger in _tracked_triggers):
+        return
+    for trigger in _tracked_triggers:
+        trigger.characters = char_ids
+    # Subscriptions are additive, so clear before resubscribing to drop characters no longer tracked
+    EVENT_CLIENT._send_queue.append(json.dumps({"service": "event", "action": "clearSubscribe", "all": "true"}))
+    EVENT_CLIENT._subscribe_all()
+    log.info('Census websocket subscribed to %s tracked characters', len(char_ids))
+
+
+def schedule_subscription_update():
+    """Update the websocket subscriptions shortly, batching any other changes made in the meantime.
+    Does nothing if the websocket isn't running, e.g. while loading players on startup."""
+    global _subscription_task
+    if not EVENT_CLIENT or (_subscription_task and not _subscription_task.done()):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
 
-    client = auraxium.event.EventClient(service_id=cfg.general['api_key'])
-    global EVENT_CLIENT
+    async def delayed_update():
+        await asyncio.sleep(SUBSCRIPTION_UPDATE_DELAY)
+        update_subscriptions()
+
+    _subscription_task = loop.create_task(delayed_update(), name="Census Subscription Update")
+
+
+def _queue_event(char_id: int, online: bool):
+    """Queue a websocket login / logout for the event consumer.  A character already queued keeps one entry,
+    moved to the back with its latest state.  New characters are dropped while the queue is full,
+    the REST online check reconciles them."""
+    _event_stats["received"] += 1
+    if char_id in _pending_events:
+        del _pending_events[char_id]
+        _event_stats["coalesced"] += 1
+    elif len(_pending_events) >= EVENT_QUEUE_SIZE:
+        _event_stats["dropped"] += 1
+        log.warning('Census event queue full, dropped %s for %s', "login" if online else "logout", char_id)
+        return
+    _pending_events[char_id] = online
+    _event_stats["max_depth"] = max(_event_stats["max_depth"], len(_pending_events))
+    _event_ready.set()
+
+
+async def _event_consumer():
+    """Single consumer for queued login / logout events, yielding to the loop between each one"""
+    while True:
+        await _event_ready.wait()
+        _event_ready.clear()
+        while _pending_events:
+            char_id = next(iter(_pending_events))
+            online = _pending_events.pop(char_id)
+            try:
+                if online:
+                    await login(char_id, accounts.account_char_ids, _tracked_players_map)
+                else:
+                    await logout(char_id, accounts.account_char_ids, _tracked_players_map)
+            except Exception as e:
+                log.error('Error processing Census %s event for %s', "login" if online else "logout", char_id,
+                          exc_info=e)
+            _event_stats["processed"] += 1
+            await asyncio.sleep(0)
+
+
+def event_queue_stats() -> dict:
+    """
+    :return: dict of websocket events received, coalesced, dropped and processed, and current / max queue depth
+    """
+    return dict(_event_stats, depth=len(_pending_events))
+
+
+async def online_status_updater(chars_players_map: dict):
+    """Responsible for updating player and account objects with their currently
+    online characters.  chars_players_map is the live char_id: Player index, read on each event"""
+    client = TrackedEventClient(service_id=cfg.general['api_key'])
+    global EVENT_CLIENT, _tracked_players_map, _consumer_task
     EVENT_CLIENT = client
+    _tracked_players_map = chars_players_map
+    char_ids = sorted(set(_tracked_char_ids()))
+    if not _consumer_task or _consumer_task.done():
+        _consumer_task = asyncio.create_task(_event_consumer(), name="Census Event Consumer")
 
-    async def login_action(evt: auraxium.event.PlayerLogin):
-        player_char_ids = chars_players_map_func()
-        await login(evt.character_id, acc_char_ids, player_char_ids)
+    # Only queue events here, so bursts are processed one at a time instead of as a task each
+    def login_action(evt: auraxium.event.PlayerLogin):
+        _queue_event(evt.character_id, True)
 
-    async def logout_action(evt: auraxium.event.PlayerLogout):
-        player_char_ids = chars_players_map_func()
-        await logout(evt.character_id, acc_char_ids, player_char_ids)
+    def logout_action(evt: auraxium.event.PlayerLogout):
+        _queue_event(evt.character_id, False)
 
     # noinspection PyTypeChecker
-    login_trigger = auraxium.Trigger(auraxium.event.PlayerLogin, worlds=[WORLD_ID], action=login_action)
+    login_trigger = CharacterTrigger(auraxium.event.PlayerLogin, characters=char_ids, worlds=[WORLD_ID],
+                                     action=login_action)
 
     # noinspection PyTypeChecker
-    logout_trigger = auraxium.Trigger(auraxium.event.PlayerLogout, worlds=[WORLD_ID], action=logout_action)
+    logout_trigger = CharacterTrigger(auraxium.event.PlayerLogout, characters=char_ids, worlds=[WORLD_ID],
+                                      action=logout_action)
 
+    _tracked_triggers[:] = [login_trigger, logout_trigger]
     client.add_trigger(login_trigger)
     client.add_trigger(logout_trigger)
 
     await client.connect()
 
 
+def rest_stats() -> dict:
+    """
+    :return: dict of REST online checks run, the logins / logouts they dispatched, and failed query chunks
+    """
+    return dict(_rest_stats)
+
+
+def rest_breaker_tripped() -> bool:
+    return _rest_schedule["failures"] >= REST_BREAKER_THRESHOLD
+
+
+def rest_check_due() -> bool:
+    """Whether the REST online check should run now.  A change in websocket health makes a check due immediately,
+    to catch up on events missed while it was down, unless the breaker is tripped."""
+    now = time.monotonic()
+    healthy = websocket_healthy()
+    if healthy != _rest_schedule["websocket_healthy"]:
+        _rest_schedule["websocket_healthy"] = healthy
+        log.info('Census websocket %s, REST online check interval now %ss', "healthy" if healthy else "unhealthy",
+                 REST_HEALTHY_INTERVAL if healthy else REST_INTERVAL)
+        if not rest_breaker_tripped():
+            _rest_schedule["next_check"] = now
+    if now < _rest_schedule["next_check"]:
+        _rest_schedule["skipped"] += 1
+        return False
+    return True
+
+
+def record_rest_check(ok: bool):
+    """Schedule the next REST online check from the result of this one, tripping or resetting the breaker"""
+    if ok:
+        if rest_breaker_tripped():
+            log.info('Census REST API recovered after %s failed online checks', _rest_schedule["failures"])
+        _rest_schedule["failures"] = 0
+        interval = REST_HEALTHY_INTERVAL if _rest_schedule["websocket_healthy"] else REST_INTERVAL
+    else:
+        _rest_schedule["failures"] += 1
+        failures = _rest_schedule["failures"]
+        if failures == REST_BREAKER_THRESHOLD:
+            _rest_schedule["trips"] += 1
+            log.warning('Census REST API failed %s online checks in a row, backing off', failures)
+        interval = REST_INTERVAL
+        if failures >= REST_BREAKER_THRESHOLD:
+            interval = min(REST_INTERVAL * 2 ** (failures - REST_BREAKER_THRESHOLD + 1), REST_BACKOFF_MAX)
+    _rest_schedule["next_check"] = time.monotonic() + interval
+
+
+def rest_schedule_stats() -> dict:
+    """
+    :return: dict of websocket health, consecutive failed checks, breaker trips, skipped loop ticks
+        and seconds until the next check
+    """
+    return dict(_rest_schedule, next_check=max(0, round(_rest_schedule["next_check"] - time.monotonic())))
+
+
+async def _online_status_chunk(client: auraxium.Client, char_ids: list[int]) -> list[dict]:
+    """Query online status for a chunk of character ids, raising ResponseError if the response is invalid"""
+    query = auraxium.census.Query('character', service_id=cfg.general['api_key'])
+    query.add_term('character_id', ','.join([str(x) for x in char_ids]))
+    query.create_join('characters_online_status')
+    query.show('character_id')
+    query.limit(len(char_ids))
+    data = await client.request(query)
+    # Manual error addition if response returned is invalid
+    if data["returned"] == 0 or 'character_id_join_characters_online_status' not in data['character_list'][0]:
+        raise auraxium.errors.ResponseError('Invalid online status response')
+    return data['character_list']
+
+
 async def online_status_rest(chars_players_map):
     if len(chars_players_map) == 0:
         return True
@@ -201,46 +524,53 @@ async def online_status_rest(chars_players_map):
     acc_char_ids = accounts.account_char_ids
 
     tracked_ids = list(acc_char_ids.keys()) + list(chars_players_map.keys())
-    ids_string = ','.join([str(x) for x in tracked_ids])
-    async with auraxium.Client(service_id=cfg.general['api_key']) as client:
-        # build query
-        query = auraxium.census.Query('character', service_id=cfg.general['api_key'])
-        query.add_term('character_id', ids_string)
-        query.create_join('characters_online_status')
-        query.show('character_id')
-        query.limit(5000)
-        try:
-            data = await client.request(query)
-            # Manual error addition if response returned is invalid
-            if data["returned"] == 0 or 'character_id_join_characters_online_status' not in data['character_list'][0]:
-                raise auraxium.errors.ResponseError
-        except (auraxium.errors.ServiceUnavailableError, auraxium.errors.ResponseError):
-            log.debug('API Unreachable REST Online Check')
-            return False
-
-    # pull data from dict response
-    online_ids = list()
-    offline_ids = list()
-    for a_return in data['character_list']:
-        if a_return['character_id_join_characters_online_status']['online_status'] == "0":
-            offline_ids.append(int(a_return['character_id']))
-        else:
-            online_ids.append(int(a_return['character_id']))
-
-    #  Gather login coroutines for online chars
-    login_coros = []
-    for char_id in online_ids:
-        login_coros.append(login(char_id, acc_char_ids, chars_players_map))
-    #  no_logout marks other chars of currently logged in accounts/users, so they are not logged out
-    no_logout = await asyncio.gather(*login_coros)
-
-    #  convert list of lists to list of all items
-    no_logout = [item for sublist in no_logout for item in sublist]
-
-    # gather offline chars, except those owned by accs/players with another char online
+    client = await get_client()
+    chunks = [tracked_ids[i:i + REST_CHUNK_SIZE] for i in range(0, len(tracked_ids), REST_CHUNK_SIZE)]
+    results = await asyncio.gather(*[_online_status_chunk(client, chunk) for chunk in chunks],
+                                   return_exceptions=True)
+
+    # pull data from dict responses.  Characters in failed chunks are in neither set, so their state is left as is
+    online_ids = set()
+    offline_ids = set()
+    failed = 0
+    for result in results:
+        if isinstance(result, (auraxium.errors.ServiceUnavailableError, auraxium.errors.ResponseError)):
+            failed += 1
+            log.debug('REST online check chunk failed: %s', result)
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        for a_return in result:
+            if a_return['character_id_join_characters_online_status']['online_status'] == "0":
+                offline_ids.add(int(a_return['character_id']))
+            else:
+                online_ids.add(int(a_return['character_id']))
+    _rest_stats["failed_chunks"] += failed
+    if failed == len(chunks):
+        log.debug('API Unreachable REST Online Check')
+        return False
+    if failed:
+        log.warning('REST online check: %s of %s chunks failed', failed, len(chunks))
+
+    # Only dispatch characters whose state differs from their account / player's online_id
+    to_login = {char_id for char_id in online_ids if not _is_online(char_id, acc_char_ids, chars_players_map)}
+    to_logout = {char_id for char_id in offline_ids if _is_online(char_id, acc_char_ids, chars_players_map)}
+    if to_logout:
+        #  Don't log out chars of accounts/users with another char online
+        for char_id in online_ids:
+            if owner := acc_char_ids.get(char_id) or chars_players_map.get(char_id):
+                to_logout.difference_update(owner.ig_ids)
+
+    await asyncio.gather(*[login(char_id, acc_char_ids, chars_players_map) for char_id in to_login])
     # Sequential rather than gather to avoid multiple logout events for the same account
-    #
-    offline_ids = set(offline_ids) - set(no_logout)
-    for char_id in offline_ids:
+    for char_id in to_logout:
         await logout(char_id, acc_char_ids, chars_players_map)
+
+    _rest_stats["polls"] += 1
+    _rest_stats["logins"] += len(to_login)
+    _rest_stats["logouts"] += len(to_logout)
+    if to_login or to_logout:
+        log.info('REST online check: %s logins, %s logouts', len(to_login), len(to_logout))
+    else:
+        log.debug('REST online check: no changes')
     return True
@@ -109,16 +109,39 @@ _collections = {
     "matches": "",
     "accounts": "",
     "account_usages": "",
-    "restart_data": ""
+    "restart_data": "",
+    "player_match_aggregates": "player_match_aggregates"
 }
 
+# Collection keys that fall back to their default above if missing from the config file
+_collections_optional = ("player_match_aggregates",)
+
 # Stored Data Config
 database = {
     "accounts_id": "",
     "accounts_sheet_name": "",
     "url": "",
     "cluster": "",
-    "collections": _collections
+    "collections": _collections,
+    "backend": "pymongo",  # "pymongo" or "motor"
+    "write_behind_interval": 5,  # Seconds between write-behind flushes
+    "write_behind_max": 200,  # Pending elements that trigger an early write-behind flush
+    "executor_workers": 8,  # Threads dedicated to blocking database calls
+    "call_timeout": 30,  # Seconds before an async database call is abandoned, 0 for no timeout
+    "load_batch_size": 500,  # Documents per cursor batch when loading whole collections
+    "load_workers": 1,  # Parallel _id range cursors when loading whole collections
+    "slow_call_threshold": 0.5,  # Seconds before a database call is logged as slow, 0 to disable
+    "stats_log_interval": 900  # Seconds between database stats log exports, 0 to disable
+}
+
+# Database keys that fall back to their default above if missing from the config file
+_database_optional = ("backend", "write_behind_interval", "write_behind_max", "executor_workers", "call_timeout",
+                      "load_batch_size", "load_workers", "slow_call_threshold", "stats_log_interval")
+
+# Anomaly Notifications, optional section
+anomaly = {
+    "name_cache_size": 1000,  # Character display names cached for anomaly leaderboards
+    "name_cache_ttl": 3600  # Seconds a cached name is kept, so Honu session links are refreshed
 }
 
 TEST = False
@@ -185,6 +208,9 @@ def get_config(config_path, test=False):
     # Collections Section
     _check_section(config, 'Collections', file)
     for key in _collections:
+        if key in _collections_optional:
+            _collections[key] = _get_optional(config, 'Collections', key, _collections[key])
+            continue
         try:
             _collections[key] = config['Collections'][key]
         except KeyError:
@@ -193,12 +219,30 @@ def get_config(config_path, test=False):
     # Database Section
     _check_section(config, 'Database', file)
     for key in database:
-        if key != "collections":
+        if key in _database_optional:
+            database[key] = _get_optional(config, 'Database', key, database[key])
+        elif key != "collections":
             try:
                 database[key] = config['Database'][key]
             except KeyError:
                 _error_incorrect(key, 'Database', file)
 
+    # Anomaly Section, optional
+    if 'Anomaly' in config:
+        for key in anomaly:
+            anomaly[key] = _get_optional(config, 'Anomaly', key, anomaly[key])
+
+
+def _get_optional(config, section, key, default):
+    """Get an optional value from the config, converted to the type of its default"""
+    if isinstance(default, bool):
+        return config[section].getboolean(key, default)
+    if isinstance(default, int):
+        return config[section].getint(key, default)
+    if isinstance(default, float):
+        return config[section].getfloat(key, default)
+    return config[section].get(key, default)
+
 
 def _check_section(config, section, file):
     if section not in config:
@@ -5,16 +5,77 @@ Taken from POGBot, https://github.com/yakMM/POG-bot
 
 # External modules
 import pymongo.collection
-from pymongo import MongoClient
-from asyncio import get_event_loop
+import pymongo.errors
+from pymongo import MongoClient, ReplaceOne, UpdateOne
+import asyncio
+import functools
+import queue
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from copy import deepcopy
 from logging import getLogger
 from typing import Callable
 
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
 log = getLogger("fs_bot")
 
 # dict for the collections
 _collections: dict[str, pymongo.collection.Collection] = dict()
 
+# dict for the motor collections, only populated if the motor backend is selected
+_async_collections: dict = dict()
+
+# Write-behind queue, pending writes by collection, then element id.
+# Each pending write is a dict of {'replace': whole element or None, 'set': fields to set, 'unset': fields to unset}
+_pending_writes: dict[str, dict] = dict()
+_flush_lock = asyncio.Lock()  # One write-behind flush in flight at a time, so writes land in queue order
+_write_behind = {"interval": 5, "max_pending": 200}
+_flush_task: asyncio.Task | None = None
+
+# Dedicated executor for blocking database calls, with its queue / wait time stats
+_executor: ThreadPoolExecutor | None = None
+_executor_config = {"workers": 8, "timeout": 30}
+_executor_stats = {"queued": 0, "running": 0, "completed": 0, "timeouts": 0, "total_wait": 0., "max_wait": 0.}
+_executor_lock = threading.Lock()
+SLOW_WAIT = 1  # Seconds waited in the executor queue before a call is logged
+
+# Bulk loading via get_all_elements
+_load_config = {"batch_size": 500, "workers": 1}
+
+# Latency instrumentation, by (collection, operation).
+# Each entry is {'count', 'errors', 'total', 'max', 'buckets'}, buckets counting calls up to each LATENCY_BUCKETS bound,
+# with a final bucket for anything slower.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+_op_stats: dict[tuple[str, str], dict] = dict()
+_op_stats_lock = threading.Lock()
+_instrumentation = {"slow_call": 0.5, "log_interval": 900}
+
+# Indexes ensured on init, by collection: list of (keys, options).
+# Array fields get multikey indexes automatically.  Lookups / sorts on _id (user_stats, get_last_element)
+# use the default _id index.
+INDEXES = {
+    "matches": [
+        ([("current_players", pymongo.ASCENDING)], {"name": "current_players"}),
+        ([("previous_players", pymongo.ASCENDING)], {"name": "previous_players"})
+    ],
+    "account_usages": [
+        ([("user_id", pymongo.ASCENDING), ("start_time", pymongo.ASCENDING)], {"name": "user_id_start_time"})
+    ]
+}
+
+# Hot query shapes, explained on init to catch any that fall back to a collection scan
+QUERY_PLAN_CHECKS = {
+    "matches": [{"$or": [{"current_players": 0}, {"previous_players": 0}]}],
+    "account_usages": [{"user_id": 0, "start_time": {"$gte": 0, "$lte": 0}}]
+}
+
 
 class DatabaseError(Exception):
     """
@@ -28,32 +89,316 @@ class DatabaseError(Exception):
         super().__init__(message)
 
 
-def init(config: dict):
+def _query_shape(value):
+    """Reduce a query or document to its shape, keeping keys and operators but replacing values by their type"""
+    if isinstance(value, dict):
+        return {k: _query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_query_shape(v) for v in value[:3]] + (["..."] if len(value) > 3 else [])
+    return type(value).__name__
+
+
+def _record_op(collection: str, operation: str, elapsed: float, error: bool, query):
+    with _op_stats_lock:
+        stats = _op_stats.get((collection, operation))
+        if not stats:
+            stats = _op_stats[(collection, operation)] = {"count": 0, "errors": 0, "total": 0., "max": 0.,
+                                                          "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+        stats["count"] += 1
+        stats["errors"] += error
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+        stats["buckets"][bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+    if _instrumentation["slow_call"] and elapsed > _instrumentation["slow_call"]:
+        log.warning("Slow database call %s on %s took %.3fs, query shape: %s",
+                    operation, collection, elapsed, _query_shape(query))
+
+
+@contextmanager
+def _timed_op(collection: str, operation: str, query=None):
+    """Record the latency and outcome of the wrapped database operation"""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        _record_op(collection, operation, time.perf_counter() - start, error, query)
+
+
+def _instrumented(func: Callable = None, *, collection_arg: int = 0):
+    """
+    Decorator recording latency stats for a db function, sync or async.
+    The operation is named after the function, without any _async_ prefix.
+
+    :param collection_arg: Index of the collection name in the function's positional args.
+    """
+    if func is None:
+        return functools.partial(_instrumented, collection_arg=collection_arg)
+    operation = func.__name__.removeprefix("_async_")
+
+    def split_args(args, kwargs):
+        if len(args) > collection_arg:
+            return args[collection_arg], args[collection_arg + 1:]
+        return kwargs.get("collection"), kwargs
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            collection, query = split_args(args, kwargs)
+            with _timed_op(collection, operation, query):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        collection, query = split_args(args, kwargs)
+        with _timed_op(collection, operation, query):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _percentile(stats: dict, fraction: float) -> float:
+    """Approximate a latency percentile from the histogram, as the upper bound of the bucket it falls in"""
+    target = stats["count"] * fraction
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+        seen += count
+        if seen >= target:
+            return min(bound, stats["max"])
+    return stats["max"]
+
+
+def op_stats() -> list[dict]:
+    """
+    Get the recorded latency stats of every database operation, slowest total time first.
+
+    :return: List of dicts of collection, operation, count, errors, and average / p50 / p95 / max seconds.
+    """
+    with _op_stats_lock:
+        snapshot = {key: dict(stats, buckets=list(stats["buckets"])) for key, stats in _op_stats.items()}
+    result = []
+    for (collection, operation), stats in sorted(snapshot.items(), key=lambda item: item[1]["total"], reverse=True):
+        result.append({"collection": collection, "operation": operation, "count": stats["count"],
+                       "errors": stats["errors"], "avg": stats["total"] / stats["count"],
+                       "p50": _percentile(stats, 0.5), "p95": _percentile(stats, 0.95), "max": stats["max"]})
+    return result
+
+
+def log_stats():
+    """Write the executor and per operation stats to the log"""
+    ex = executor_stats()
+    log.info("Database executor: %s workers, %s queued, %s running, %s completed, %s timeouts, "
+             "avg wait %.3fs, max wait %.3fs", ex["workers"], ex["queued"], ex["running"], ex["completed"],
+             ex["timeouts"], ex["avg_wait"], ex["max_wait"])
+    for stats in op_stats():
+        log.info("Database %s.%s: %s calls, %s errors, avg %.4fs, p50 %.4fs, p95 %.4fs, max %.4fs",
+                 stats["collection"], stats["operation"], stats["count"], stats["errors"],
+                 stats["avg"], stats["p50"], stats["p95"], stats["max"])
+
+
+async def stats_log_loop():
+    """Export the database stats to the log on the configured interval, for the lifetime of the bot"""
+    if not _instrumentation["log_interval"]:
+        return
+    while True:
+        await asyncio.sleep(_instrumentation["log_interval"])
+        log_stats()
+
+
+def init(config: dict, client=None):
     """
     Initialize the MongoClient and create a dictionary of available collections.
 
     :param config: Dictionary containing database config. Check :data:`modules.config.database`.
+    :param client: Optional MongoClient compatible client to use instead of connecting to config["url"],
+     e.g. a mongomock client for local benchmarks.
     """
-    cluster = MongoClient(config["url"])
+    cluster = client or MongoClient(config["url"])
     db = cluster[config["cluster"]]
     for collection in config["collections"]:
         _collections[collection] = db[config["collections"][collection]]
 
+    # The sync client is always kept, for startup loading and calls made outside the event loop
+    if config.get("backend", "pymongo") == "motor":
+        if not AsyncIOMotorClient:
+            raise DatabaseError("motor backend selected, but motor is not installed")
+        async_db = AsyncIOMotorClient(config["url"])[config["cluster"]]
+        for collection in config["collections"]:
+            _async_collections[collection] = async_db[config["collections"][collection]]
+        log.info("Database using motor backend")
+
+    _write_behind["interval"] = config.get("write_behind_interval", _write_behind["interval"])
+    _write_behind["max_pending"] = config.get("write_behind_max", _write_behind["max_pending"])
+
+    _instrumentation["slow_call"] = config.get("slow_call_threshold", _instrumentation["slow_call"])
+    _instrumentation["log_interval"] = config.get("stats_log_interval", _instrumentation["log_interval"])
+    _load_config["batch_size"] = config.get("load_batch_size", _load_config["batch_size"])
+    _load_config["workers"] = config.get("load_workers", _load_config["workers"])
+
+    global _executor
+    _executor_config["workers"] = config.get("executor_workers", _executor_config["workers"])
+    _executor_config["timeout"] = config.get("call_timeout", _executor_config["timeout"])
+    _executor = ThreadPoolExecutor(max_workers=_executor_config["workers"], thread_name_prefix="fs_bot_db")
+
+    ensure_indexes()
+    for collection, queries in QUERY_PLAN_CHECKS.items():
+        for query in queries:
+            check_query_plan(collection, query)
+
+
+def ensure_indexes():
+    """
+    Create any missing indexes declared in :data:`INDEXES`.  Existing indexes are left untouched.
+    """
+    for collection, indexes in INDEXES.items():
+        if collection not in _collections:
+            continue
+        for keys, options in indexes:
+            try:
+                _collections[collection].create_index(keys, **options)
+            except pymongo.errors.OperationFailure as e:
+                log.error("Could not create index %s on %s: %s", options.get("name", keys), collection, e)
+
+
+def _plan_stages(plan: dict):
+    """Yield every stage name in a query plan tree"""
+    yield plan.get("stage")
+    for child in [plan.get("inputStage"), *plan.get("inputStages", [])]:
+        if child:
+            yield from _plan_stages(child)
+
+
+def check_query_plan(collection: str, query: dict) -> bool:
+    """
+    Explain a query, and log a warning if its winning plan is a collection scan.
 
-def get_all_elements(init_class_method: Callable, collection: str):
+    :param collection: Collection name.
+    :param query: Query to explain.
+    :return: False if the query falls back to a collection scan, True otherwise.
     """
-    Get all elements of a given collection.
+    if collection not in _collections:
+        return True
+    try:
+        plan = _collections[collection].find(query).explain()["queryPlanner"]["winningPlan"]
+    except (pymongo.errors.PyMongoError, KeyError, AttributeError, NotImplementedError) as e:
+        # Also covers stand-in clients without explain support
+        log.debug("Could not explain query on %s: %s", collection, e)
+        return True
+    # Plans from the slot based engine are nested under queryPlan
+    if "COLLSCAN" in _plan_stages(plan.get("queryPlan", plan)):
+        log.warning("Query on %s falls back to a collection scan: %s", collection, query)
+        return False
+    return True
+
+
+def _id_ranges(collection: str, parts: int) -> list[dict]:
+    """
+    Split a collection into roughly equal _id ranges, using the _id index.
+
+    :param collection: Collection name.
+    :param parts: Number of ranges wanted.
+    :return: List of _id filters, covering the whole collection without overlap.
+    """
+    count = _collections[collection].estimated_document_count()
+    bounds = []
+    for i in range(1, parts):
+        found = list(_collections[collection].find({}, {"_id": 1}, sort=[("_id", 1)],
+                                                   skip=count * i // parts, limit=1))
+        if found and (not bounds or found[0]["_id"] > bounds[-1]):
+            bounds.append(found[0]["_id"])
+    lows, highs = [None] + bounds, bounds + [None]
+    ranges = []
+    for low, high in zip(lows, highs):
+        id_filter = {}
+        if low is not None:
+            id_filter["$gte"] = low
+        if high is not None:
+            id_filter["$lt"] = high
+        ranges.append({"_id": id_filter} if id_filter else {})
+    return ranges
+
+
+def _read_range(collection: str, query: dict, projection, batch_size: int, out: queue.Queue,
+                stop: threading.Event):
+    """Read a cursor range into the output queue in batches, ending with None, or the exception raised.
+    Gives up once stop is set, so the reader can't block forever on a full queue."""
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        batch = []
+        for doc in _collections[collection].find(query, projection, batch_size=batch_size):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                if not put(batch):
+                    return
+                batch = []
+        if batch and not put(batch):
+            return
+        put(None)
+    except Exception as e:
+        put(e)
+
+
+@_instrumented(collection_arg=1)
+def get_all_elements(init_class_method: Callable, collection: str, projection: dict = None,
+                     batch_size: int = None, workers: int = None) -> int:
+    """
+    Get all elements of a given collection.  Elements are streamed from the server in batches,
+    and with multiple workers, read from parallel _id range cursors.  init_class_method is always called
+    from the calling thread.
 
     :param init_class_method: The data will be passed to this method.
     :param collection: Collection name.
+    :param projection: Fields to retrieve, all fields if None.
+    :param batch_size: Documents per cursor batch, defaults to the configured load_batch_size.
+    :param workers: Parallel cursors to read from, defaults to the configured load_workers.
+    :return: Number of elements passed to init_class_method.
     :raise DatabaseError: If an error occurs while passing data.
     """
-    # Get all elements
-    items = _collections[collection].find()
-    # Pass them to the method
+    batch_size = batch_size or _load_config["batch_size"]
+    workers = workers or _load_config["workers"]
+    loaded = 0
     try:
-        for result in items:
-            init_class_method(result)
+        if workers <= 1:
+            for result in _collections[collection].find({}, projection, batch_size=batch_size):
+                init_class_method(result)
+                loaded += 1
+            return loaded
+
+        ranges = _id_ranges(collection, workers)
+        batches = queue.Queue(maxsize=len(ranges) * 4)
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="fs_bot_db_load") as pool:
+            for query in ranges:
+                # Each cursor gets its own copy of the projection, as it is shared across threads
+                pool.submit(_read_range, collection, query, projection and dict(projection), batch_size,
+                            batches, stop)
+            try:
+                remaining = len(ranges)
+                while remaining:
+                    batch = batches.get()
+                    if batch is None:
+                        remaining -= 1
+                        continue
+                    if isinstance(batch, Exception):
+                        raise batch
+                    for result in batch:
+                        init_class_method(result)
+                    loaded += len(batch)
+            finally:
+                stop.set()
+        return loaded
     except KeyError as e:
         raise DatabaseError(f"KeyError when retrieving {collection} from database: {e}")
 
@@ -61,16 +406,73 @@ def get_all_elements(init_class_method: Callable, collection: str):
 async def async_db_call(call: Callable, *args, **kwargs):
     """
     Call a db function asynchronously.
+    If the motor backend is enabled and the function has a native async version, that is awaited directly,
+    otherwise the call is run in the database executor.
 
     :param call: Function to call.
     :param args: Args to pass to the called function.
     :param kwargs: Kwargs to pass to the called function
     :return: Return the result of the call.
+    :raise DatabaseError: If the call doesn't complete within the configured call_timeout.
+    """
+    timeout = _executor_config["timeout"] or None
+    try:
+        if _async_collections and (async_call := _async_calls.get(call)):
+            return await asyncio.wait_for(async_call(*args, **kwargs), timeout)
+
+        with _executor_lock:
+            _executor_stats["queued"] += 1
+        future = _executor.submit(_run_in_executor, time.perf_counter(), call, args, kwargs)
+        future.add_done_callback(_dequeue_cancelled)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        with _executor_lock:
+            _executor_stats["timeouts"] += 1
+        raise DatabaseError(f"{call.__name__} timed out after {timeout}s")
+
+
+def _dequeue_cancelled(future: Future):
+    """Removes a call from the queued count if it was cancelled (e.g. timed out) before it started"""
+    if future.cancelled():
+        with _executor_lock:
+            _executor_stats["queued"] -= 1
+
+
+def _run_in_executor(submitted: float, call: Callable, args, kwargs):
+    """Runs a db call on an executor thread, recording how long it waited in the queue"""
+    wait = time.perf_counter() - submitted
+    with _executor_lock:
+        _executor_stats["queued"] -= 1
+        _executor_stats["running"] += 1
+        _executor_stats["total_wait"] += wait
+        _executor_stats["max_wait"] = max(_executor_stats["max_wait"], wait)
+        queued = _executor_stats["queued"]
+    if wait > SLOW_WAIT:
+        log.warning("Database call %s waited %.2fs for an executor thread, %s calls still queued",
+                    call.__name__, wait, queued)
+    try:
+        return call(*args, **kwargs)
+    finally:
+        with _executor_lock:
+            _executor_stats["running"] -= 1
+            _executor_stats["completed"] += 1
+
+
+def executor_stats() -> dict:
+    """
+    Get the current state of the database executor.
+
+    :return: Dict of workers, queue depth, running calls, completed calls, timeouts, and average / max wait seconds.
     """
-    loop = get_event_loop()
-    return await loop.run_in_executor(None, lambda: call(*args, **kwargs))
+    with _executor_lock:
+        stats = dict(_executor_stats)
+    completed = stats.pop("completed")
+    total_wait = stats.pop("total_wait")
+    return {"workers": _executor_config["workers"], **stats, "completed": completed,
+            "avg_wait": total_wait / completed if completed else 0.}
 
 
+@_instrumented
 def force_update(collection: str, elements):
     """
     This is typically called from external scripts for db maintenance.
@@ -83,6 +485,7 @@ def force_update(collection: str, elements):
     _collections[collection].insert_many(elements)
 
 
+@_instrumented
 def set_field(collection: str, e_id: int, doc: dict):
     """
     Set the field of an element. In other words, update an element.
@@ -92,11 +495,10 @@ def set_field(collection: str, e_id: int, doc: dict):
     :param doc: Data to set.
     :raise DatabaseError: If the element is not in the collection.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].update_one({"_id": e_id}, {"$set": doc})
-    else:
+    if _collections[collection].update_one({"_id": e_id}, {"$set": doc}).matched_count == 0:
         raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
 
+@_instrumented
 def unset_field(collection: str, e_id: int, doc: dict):
     """
     Unset (remove) the field of an element. In other words, update an element.
@@ -106,12 +508,11 @@ def unset_field(collection: str, e_id: int, doc: dict):
     :param doc: Data to unset.
     :raise DatabaseError: If the element is not in the collection.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].update_one({"_id": e_id}, {"$unset": doc})
-    else:
+    if _collections[collection].update_one({"_id": e_id}, {"$unset": doc}).matched_count == 0:
         raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
 
 
+@_instrumented
 def push_element(collection: str, e_id: int, doc: dict):
     """
     Push data in the field of an element.
@@ -121,12 +522,11 @@ def push_element(collection: str, e_id: int, doc: dict):
     :param doc: Data to push. The key should be the field to push to.
     :raise DatabaseError: If the element is not in the collection.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].update_one({"_id": e_id}, {"$push": doc})
-    else:
+    if _collections[collection].update_one({"_id": e_id}, {"$push": doc}).matched_count == 0:
         raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
 
 
+@_instrumented
 def upsert_push_element(collection: str, e_id: int, doc: dict):
     """
     Push data in the field of an element.  Create the element if it does not already exist
@@ -138,6 +538,7 @@ def upsert_push_element(collection: str, e_id: int, doc: dict):
     _collections[collection].update_one({"_id": e_id}, {"$push": doc}, upsert=True)
 
 
+@_instrumented
 def get_element(collection: str, item_id: int) -> (dict, None):
     """
     Get a single element.
@@ -146,19 +547,21 @@ def get_element(collection: str, item_id: int) -> (dict, None):
     :param item_id: Element id.
     :return: Element found, or None if not found.
     """
-    if _collections[collection].count_documents({"_id": item_id}) == 0:
-        return
-    item = _collections[collection].find_one({"_id": item_id})
-    return item
+    return _collections[collection].find_one({"_id": item_id})
 
 
+@_instrumented
 def get_last_element(collection: str) -> (dict, None):
-    if _collections[collection].count_documents({}) == 0:
-        return
-    items = _collections[collection].find(filter={}, limit=1, sort=[('_id', -1)])
-    return items[0]
+    """
+    Get the element with the highest id.
+
+    :param collection: Collection name.
+    :return: Element found, or None if the collection is empty.
+    """
+    return _collections[collection].find_one({}, sort=[('_id', -1)])
 
 
+@_instrumented
 def get_field(collection: str, e_id: int, specific: str):
     """
     Get one field of a single element.
@@ -167,13 +570,15 @@ def get_field(collection: str, e_id: int, specific: str):
     :param e_id: Element id.
     :param specific: Field name.
     :return: Element found, or None if not found.
+    :raise KeyError: If the element doesn't have the field.
     """
-    if _collections[collection].count_documents({"_id": e_id}) == 0:
+    item = _collections[collection].find_one({"_id": e_id}, {"_id": False, specific: True})
+    if item is None:
         return
-    item = _collections[collection].find_one({"_id": e_id}, {"_id": False, specific: True})[specific]
-    return item
+    return item[specific]
 
 
+@_instrumented
 def set_element(collection: str, e_id: id, data: dict):
     """
     Set a whole element (with all its field). Replace if the element already exists.
@@ -182,12 +587,11 @@ def set_element(collection: str, e_id: id, data: dict):
     :param e_id: Element id.
     :param data: Element data.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].replace_one({"_id": e_id}, data)
-    else:
-        _collections[collection].insert_one(data)
+    _discard_pending(collection, e_id)
+    _collections[collection].replace_one({"_id": e_id}, data, upsert=True)
 
 
+@_instrumented
 def remove_element(collection: str, e_id: int):
     """
     Remove an element from the database.
@@ -196,32 +600,352 @@ def remove_element(collection: str, e_id: int):
     :param e_id: Element id.
     :raise DatabaseError: If the element is not in the collection.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].delete_one({"_id": e_id})
-    else:
+    _discard_pending(collection, e_id)
+    if _collections[collection].delete_one({"_id": e_id}).deleted_count == 0:
         raise DatabaseError(f"Element {e_id} doesn't exist in collection {collection}")
 
 
-def find_elements(collection: str, query: dict, projection=None):
+@_instrumented
+def find_elements(collection: str, query: dict, projection=None) -> list:
     """
-    Query a collection via selection_criteria query
+    Query a collection via selection_criteria query.
+    Results are read into a list, so the whole query runs (and is timed) on the calling thread.
 
     """
     if projection:
-        return _collections[collection].find(query, projection)
-    return _collections[collection].find(query)
+        return list(_collections[collection].find(query, projection))
+    return list(_collections[collection].find(query))
 
 
-def aggregate_fields(collection: str, query: list):
+@_instrumented
+def aggregate_fields(collection: str, query: list) -> list:
     """
-    Aggregate a collection via query list, using keywords for $match, $group, $project dicts etc
+    Aggregate a collection via query list, using keywords for $match, $group, $project dicts etc.
+    Results are read into a list, as with find_elements.
     """
-    return _collections[collection].aggregate(query)
+    return list(_collections[collection].aggregate(query))
 
 
+@_instrumented
 def add_element(collection: str, doc):
     """
     Add an element to a collection, with an unspecified object ID
     """
     _collections[collection].insert_one(doc)
 
+
+@_instrumented
+def upsert_inc_elements(collection: str, docs: dict):
+    """
+    Increment fields of several elements in one bulk write.  Create the elements if they do not already exist.
+
+    :param collection: Collection name.
+    :param docs: Dict of element id: data to increment.
+    """
+    if docs:
+        _collections[collection].bulk_write([UpdateOne({"_id": e_id}, {"$inc": doc}, upsert=True)
+                                             for e_id, doc in docs.items()], ordered=False)
+
+
+def _get_pending(collection: str, e_id) -> dict:
+    pending = _pending_writes.setdefault(collection, dict())
+    if e_id not in pending:
+        pending[e_id] = {'replace': None, 'set': dict(), 'unset': dict()}
+    return pending[e_id]
+
+
+def _discard_pending(collection: str, e_id):
+    """Drop queued writes for an element, used when the element is written or removed directly"""
+    if collection in _pending_writes:
+        _pending_writes[collection].pop(e_id, None)
+
+
+def queue_set_element(collection: str, e_id: int, data: dict):
+    """
+    Queue a whole element to be set on the next write-behind flush.  Replaces any pending writes for the element.
+
+    :param collection: Collection name.
+    :param e_id: Element id.
+    :param data: Element data.
+    """
+    pending = _get_pending(collection, e_id)
+    pending['replace'] = deepcopy(data)
+    pending['set'].clear()
+    pending['unset'].clear()
+    _check_pending_size()
+
+
+def queue_set_field(collection: str, e_id: int, doc: dict):
+    """
+    Queue fields of an element to be set on the next write-behind flush, merged with any pending writes.
+    Unlike set_field, a missing element is only logged at flush time.
+
+    :param collection: Collection name.
+    :param e_id: Element id.
+    :param doc: Data to set.
+    """
+    pending = _get_pending(collection, e_id)
+    doc = deepcopy(doc)
+    if pending['replace'] is not None:
+        pending['replace'].update(doc)
+    else:
+        pending['set'].update(doc)
+        for key in doc:
+            pending['unset'].pop(key, None)
+    _check_pending_size()
+
+
+def queue_unset_field(collection: str, e_id: int, doc: dict):
+    """
+    Queue fields of an element to be unset on the next write-behind flush, merged with any pending writes.
+
+    :param collection: Collection name.
+    :param e_id: Element id.
+    :param doc: Data to unset.
+    """
+    pending = _get_pending(collection, e_id)
+    if pending['replace'] is not None:
+        for key in doc:
+            pending['replace'].pop(key, None)
+    else:
+        pending['unset'].update({key: "" for key in doc})
+        for key in doc:
+            pending['set'].pop(key, None)
+    _check_pending_size()
+
+
+def pending_count() -> int:
+    """Number of elements with writes waiting in the write-behind queue"""
+    return sum(len(pending) for pending in _pending_writes.values())
+
+
+def _check_pending_size():
+    """Start a flush early if the write-behind queue is over its size threshold"""
+    global _flush_task
+    if pending_count() < _write_behind["max_pending"] or (_flush_task and not _flush_task.done()):
+        return
+    try:
+        _flush_task = asyncio.get_running_loop().create_task(async_flush_writes())
+    except RuntimeError:  # No running loop, left for the next explicit flush
+        pass
+
+
+def _take_pending() -> dict[str, dict]:
+    """Swap out the write-behind queue, returning the writes that were pending"""
+    global _pending_writes
+    taken, _pending_writes = _pending_writes, dict()
+    return taken
+
+
+def _merge_writes(older: dict, newer: dict) -> dict:
+    """Apply a newer pending write for an element on top of an older one"""
+    if newer['replace'] is not None:
+        return newer
+    if older['replace'] is not None:
+        older['replace'].update(newer['set'])
+        for key in newer['unset']:
+            older['replace'].pop(key, None)
+        return older
+    for key in newer['set']:
+        older['unset'].pop(key, None)
+    for key in newer['unset']:
+        older['set'].pop(key, None)
+    older['set'].update(newer['set'])
+    older['unset'].update(newer['unset'])
+    return older
+
+
+def _requeue(taken: dict[str, dict]):
+    """Put writes back in the queue after a failed flush, with any writes queued since applied on top"""
+    for collection, pending in taken.items():
+        queued = _pending_writes.setdefault(collection, dict())
+        for e_id, write in pending.items():
+            queued[e_id] = _merge_writes(write, queued[e_id]) if e_id in queued else write
+
+
+def _build_ops(pending: dict) -> list:
+    ops = []
+    for e_id, write in pending.items():
+        if write['replace'] is not None:
+            ops.append(ReplaceOne({"_id": e_id}, write['replace'], upsert=True))
+            continue
+        update = {}
+        if write['set']:
+            update["$set"] = write['set']
+        if write['unset']:
+            update["$unset"] = write['unset']
+        if update:
+            ops.append(UpdateOne({"_id": e_id}, update))
+    return ops
+
+
+def _check_bulk_result(collection: str, ops: list, result):
+    if missing := len(ops) - result.matched_count - result.upserted_count:
+        log.warning("write-behind: %s updates in %s matched no element", missing, collection)
+
+
+def _write_pending(taken: dict[str, dict]):
+    """Write the taken writes as one unordered bulk_write per collection"""
+    for collection, pending in taken.items():
+        if ops := _build_ops(pending):
+            with _timed_op(collection, "bulk_write"):
+                _check_bulk_result(collection, ops, _collections[collection].bulk_write(ops, ordered=False))
+
+
+def flush_writes():
+    """
+    Write everything in the write-behind queue, blocking.  Used outside the event loop, e.g. when shutting down.
+    """
+    _write_pending(_take_pending())
+
+
+async def async_flush_writes() -> bool:
+    """
+    Write everything in the write-behind queue.  Writes are put back in the queue if the flush fails.
+
+    :return: Whether the flush succeeded.
+    """
+    async with _flush_lock:
+        if not (taken := _take_pending()):
+            return True
+        try:
+            await async_db_call(_write_pending, taken)
+        except (pymongo.errors.PyMongoError, DatabaseError) as e:
+            _requeue(taken)
+            log.error("write-behind flush failed, writes requeued: %s", e)
+            return False
+        return True
+
+
+async def write_behind_loop():
+    """Flush the write-behind queue on an interval, for the lifetime of the bot"""
+    while True:
+        await asyncio.sleep(_write_behind["interval"])
+        await async_flush_writes()
+
+
+# Native async versions of the above, used through async_db_call when the motor backend is enabled.
+
+@_instrumented(collection_arg=1)
+async def _async_get_all_elements(init_class_method: Callable, collection: str, projection: dict = None,
+                                  batch_size: int = None, workers: int = None) -> int:
+    # A single motor cursor already streams without blocking the loop, so workers is not used here
+    loaded = 0
+    try:
+        async for result in _async_collections[collection].find(
+                {}, projection, batch_size=batch_size or _load_config["batch_size"]):
+            init_class_method(result)
+            loaded += 1
+        return loaded
+    except KeyError as e:
+        raise DatabaseError(f"KeyError when retrieving {collection} from database: {e}")
+
+
+@_instrumented
+async def _async_set_field(collection: str, e_id: int, doc: dict):
+    result = await _async_collections[collection].update_one({"_id": e_id}, {"$set": doc})
+    if result.matched_count == 0:
+        raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
+
+
+@_instrumented
+async def _async_unset_field(collection: str, e_id: int, doc: dict):
+    result = await _async_collections[collection].update_one({"_id": e_id}, {"$unset": doc})
+    if result.matched_count == 0:
+        raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
+
+
+@_instrumented
+async def _async_push_element(collection: str, e_id: int, doc: dict):
+    result = await _async_collections[collection].update_one({"_id": e_id}, {"$push": doc})
+    if result.matched_count == 0:
+        raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
+
+
+@_instrumented
+async def _async_upsert_push_element(collection: str, e_id: int, doc: dict):
+    await _async_collections[collection].update_one({"_id": e_id}, {"$push": doc}, upsert=True)
+
+
+@_instrumented
+async def _async_get_element(collection: str, item_id: int) -> (dict, None):
+    return await _async_collections[collection].find_one({"_id": item_id})
+
+
+@_instrumented
+async def _async_get_last_element(collection: str) -> (dict, None):
+    return await _async_collections[collection].find_one({}, sort=[('_id', -1)])
+
+
+@_instrumented
+async def _async_get_field(collection: str, e_id: int, specific: str):
+    item = await _async_collections[collection].find_one({"_id": e_id}, {"_id": False, specific: True})
+    if item is None:
+        return
+    return item[specific]
+
+
+@_instrumented
+async def _async_set_element(collection: str, e_id: id, data: dict):
+    _discard_pending(collection, e_id)
+    await _async_collections[collection].replace_one({"_id": e_id}, data, upsert=True)
+
+
+@_instrumented
+async def _async_remove_element(collection: str, e_id: int):
+    _discard_pending(collection, e_id)
+    result = await _async_collections[collection].delete_one({"_id": e_id})
+    if result.deleted_count == 0:
+        raise DatabaseError(f"Element {e_id} doesn't exist in collection {collection}")
+
+
+@_instrumented
+async def _async_find_elements(collection: str, query: dict, projection=None):
+    if projection:
+        return await _async_collections[collection].find(query, projection).to_list(None)
+    return await _async_collections[collection].find(query).to_list(None)
+
+
+@_instrumented
+async def _async_aggregate_fields(collection: str, query: list):
+    return await _async_collections[collection].aggregate(query).to_list(None)
+
+
+@_instrumented
+async def _async_add_element(collection: str, doc):
+    await _async_collections[collection].insert_one(doc)
+
+
+@_instrumented
+async def _async_upsert_inc_elements(collection: str, docs: dict):
+    if docs:
+        await _async_collections[collection].bulk_write([UpdateOne({"_id": e_id}, {"$inc": doc}, upsert=True)
+                                                         for e_id, doc in docs.items()], ordered=False)
+
+
+async def _async_write_pending(taken: dict[str, dict]):
+    for collection, pending in taken.items():
+        if ops := _build_ops(pending):
+            with _timed_op(collection, "bulk_write"):
+                _check_bulk_result(collection, ops,
+                                   await _async_collections[collection].bulk_write(ops, ordered=False))
+
+
+# Map of sync db functions to their native async version
+_async_calls: dict[Callable, Callable] = {
+    get_all_elements: _async_get_all_elements,
+    set_field: _async_set_field,
+    unset_field: _async_unset_field,
+    push_element: _async_push_element,
+    upsert_push_element: _async_upsert_push_element,
+    get_element: _async_get_element,
+    get_last_element: _async_get_last_element,
+    get_field: _async_get_field,
+    set_element: _async_set_element,
+    remove_element: _async_remove_element,
+    find_elements: _async_find_elements,
+    aggregate_fields: _async_aggregate_fields,
+    add_element: _async_add_element,
+    upsert_inc_elements: _async_upsert_inc_elements,
+    _write_pending: _async_write_pending
+}
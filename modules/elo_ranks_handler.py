@@ -179,6 +179,7 @@ async def update_player_ranks(player_stats=None):
         update_coroutines.append(player_stat.push_to_db())
 
     await asyncio.gather(*update_coroutines)
+    await db.async_flush_writes()  # Write all queued stats as one bulk write
 
 
 def create_rank_dict() -> dict:
@@ -0,0 +1,143 @@
+"""Module to maintain per player duel aggregates, so /stats doesn't have to load a player's whole match history.
+
+Each player_match_aggregates element holds:
+{'_id': player_id, 'total_matches': int, 'total_duel_sec': int, 'partners': {str(partner_id): match_count}}
+Plus a BACKFILL_MARKER element, written once a backfill has completed.
+"""
+
+# External Imports
+from logging import getLogger
+
+# Internal Imports
+from modules import database as db
+
+log = getLogger('fs_bot')
+
+COLLECTION = 'player_match_aggregates'
+BACKFILL_MARKER = 'backfill_complete'  # _id of the element marking a completed backfill
+
+_backfilled = False  # Whether aggregates cover the whole match history, /stats uses the pipeline until they do
+
+
+def _match_players(match_data: dict) -> list[int]:
+    return match_data.get('current_players', []) + match_data.get('previous_players', [])
+
+
+def _player_increments(player_id: int, match_data: dict) -> dict:
+    """Build the $inc document for a single player's aggregate, from a matches element"""
+    inc = {'total_matches': 1}
+    # Duration only counted with both stamps, as the pipeline's $sum ignores a $subtract with a missing stamp
+    if match_data.get('start_stamp') and match_data.get('end_stamp'):
+        inc['total_duel_sec'] = match_data['end_stamp'] - match_data['start_stamp']
+    for partner_id in _match_players(match_data):
+        if partner_id == player_id:
+            continue
+        key = f'partners.{partner_id}'
+        inc[key] = inc.get(key, 0) + 1
+    return inc
+
+
+async def init():
+    """Backfill the aggregates if no backfill has completed, e.g. on first start with aggregates or after a
+    failed backfill.  Otherwise players with earlier matches would only have the matches ended since counted."""
+    global _backfilled
+    _backfilled = await db.async_db_call(db.get_element, COLLECTION, BACKFILL_MARKER) is not None
+    if not _backfilled:
+        log.info('Match aggregates not backfilled, backfilling from matches')
+        await backfill()
+
+
+def is_backfilled() -> bool:
+    """Whether the aggregates are complete, i.e. a backfill has completed"""
+    return _backfilled
+
+
+async def update_from_match(match_data: dict):
+    """Increment the aggregates of every player in an ended match, from its matches element"""
+    increments = {p_id: _player_increments(p_id, match_data) for p_id in set(_match_players(match_data))}
+    await db.async_db_call(db.upsert_inc_elements, COLLECTION, increments)
+
+
+async def get_player_aggregates(player_id: int) -> dict | None:
+    """Retrieve a player's aggregates, None if they have no recorded matches"""
+    return await db.async_db_call(db.get_element, COLLECTION, player_id)
+
+
+def top_partners(aggregates: dict, count: int = 3) -> list[tuple[int, int]]:
+    """Return a list of (partner_id, match_count) for the players most frequent duel partners"""
+    partners = sorted(aggregates.get('partners', {}).items(), key=lambda item: item[1], reverse=True)
+    return [(int(partner_id), match_count) for partner_id, match_count in partners[:count]]
+
+
+def stats_pipeline(player_id: int, partner_limit: int = 3) -> list[dict]:
+    """Build an aggregation pipeline computing a player's duel stats from the matches collection, server side.
+    Only the player arrays and stamps leave the $project stage, so match logs are never transferred.
+
+    :param player_id: Player to compute stats for.
+    :param partner_limit: Number of top duel partners to return.
+    :return: Pipeline returning a single document of {'totals': [...], 'partners': [...]}
+    """
+    return [
+        {'$match': {'$or': [{'current_players': player_id}, {'previous_players': player_id}]}},
+        {'$project': {'_id': 0,
+                      'duel_sec': {'$subtract': ['$end_stamp', '$start_stamp']},
+                      'partners': {'$concatArrays': ['$current_players', '$previous_players']}}},
+        {'$facet': {
+            'totals': [{'$group': {'_id': None,
+                                   'total_matches': {'$sum': 1},
+                                   'total_duel_sec': {'$sum': '$duel_sec'}}}],
+            'partners': [{'$unwind': '$partners'},
+                         {'$match': {'partners': {'$ne': player_id}}},
+                         {'$group': {'_id': '$partners', 'count': {'$sum': 1}}},
+                         {'$sort': {'count': -1, '_id': 1}},
+                         {'$limit': partner_limit}]
+        }}
+    ]
+
+
+async def query_player_stats(player_id: int, partner_limit: int = 3) -> dict | None:
+    """Compute a player's duel stats directly from the matches collection, via stats_pipeline.
+    Returns the same shape as a player_match_aggregates element, with only the top partners included.
+    None if the player has no matches."""
+    result = await db.async_db_call(db.aggregate_fields, 'matches', stats_pipeline(player_id, partner_limit))
+    result = list(result)
+    if not result or not result[0]['totals']:
+        return None
+    totals = result[0]['totals'][0]
+    return {'_id': player_id,
+            'total_matches': totals['total_matches'],
+            'total_duel_sec': totals['total_duel_sec'],
+            'partners': {str(partner['_id']): partner['count'] for partner in result[0]['partners']}}
+
+
+async def backfill() -> tuple[int, int]:
+    """Rebuild all aggregates from the matches collection, replacing the existing aggregates.
+    Matches that end while the backfill runs may be missed, so this is best run while the bot is locked.
+
+    :return: Tuple of (players, matches) processed
+    """
+    global _backfilled
+    _backfilled = False
+    matches = await db.async_db_call(db.find_elements, 'matches', {},
+                                     {'current_players': 1, 'previous_players': 1,
+                                      'start_stamp': 1, 'end_stamp': 1})
+    aggregates = dict()
+    match_count = 0
+    for match_data in matches:
+        match_count += 1
+        for p_id in set(_match_players(match_data)):
+            agg = aggregates.setdefault(p_id, {'_id': p_id, 'total_matches': 0, 'total_duel_sec': 0, 'partners': {}})
+            for key, value in _player_increments(p_id, match_data).items():
+                if key.startswith('partners.'):
+                    partner_id = key.split('.', 1)[1]
+                    agg['partners'][partner_id] = agg['partners'].get(partner_id, 0) + value
+                else:
+                    agg[key] += value
+
+    if aggregates:  # Also deletes the marker, so a backfill failing part way is rerun on next start
+        await db.async_db_call(db.force_update, COLLECTION, list(aggregates.values()))
+    await db.async_db_call(db.set_element, COLLECTION, BACKFILL_MARKER,
+                           {'_id': BACKFILL_MARKER, 'players': len(aggregates), 'matches': match_count})
+    _backfilled = True
+    log.info('Backfilled match aggregates for %s players from %s matches', len(aggregates), match_count)
+    return len(aggregates), match_count
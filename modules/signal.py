@@ -29,6 +29,12 @@ async def save_state(loop):
     # Terminate all active account sessions
     await accounts.terminate_all()
 
+    # Write any stats / player updates still in the write-behind queue
+    try:
+        db.flush_writes()
+    except Exception as e:
+        log.error('Error flushing database writes %s', e)
+
     # Ensure Auraxium event client's session is closed
     if census.EVENT_CLIENT and census.EVENT_CLIENT.websocket:
         try:
@@ -36,6 +42,12 @@ async def save_state(loop):
         except Exception as e:
             log.error('Error closing event client %s', e)
 
+    # Close the shared Census REST client's connection pool
+    try:
+        await census.close()
+    except Exception as e:
+        log.error('Error closing census client %s', e)
+
     # save dm threads to DB, likely unnecessary as threads are saved on creation/deletion
     dm_dict = cogs.direct_messages.dm_threads_to_str()
     db.set_field('restart_data', 0, {'dm_threads': dm_dict})
@@ -4,6 +4,7 @@ from datetime import datetime as dt
 from typing import Literal
 from enum import Enum
 import aiohttp
+import json
 import re
 
 import discord
@@ -77,6 +78,13 @@ def compare_embeds(embed1, embed2) -> bool:
     return embed1dict == embed2dict
 
 
+def embed_hash(embed) -> int:
+    """Hash of an embed's content (after removing timestamp), to check if a rendered embed changed"""
+    embed_dict = embed.to_dict()
+    embed_dict.pop('timestamp', None)
+    return hash(json.dumps(embed_dict, sort_keys=True, default=str))
+
+
 def format_time_from_stamp(timestamp: int, type_str: Literal["f", "F", "d", "D", "t", "T", "R"] = "t") -> str:
     """converts a timestamp into a time formatted for discord.
     type indicates what format will be used, options are